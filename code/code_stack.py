@@ -1084,15 +1084,6 @@ def create_streamlit_export_lambda(self):
                 )
             ],
         )
-        export_lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=["secretsmanager:GetSecretValue", "secretsmanager:DescribeSecret"],
-                resources=[
-                    f"arn:aws:secretsmanager:{Aws.REGION}:{Aws.ACCOUNT_ID}:secret:{self.SECRET_MANAGER_NAME}*"
-                ]
-            )
-        )
-
         # Bedrock agent permissions
         export_lambda_role.add_to_policy(
             iam.PolicyStatement(
@@ -1120,7 +1111,6 @@ def create_streamlit_export_lambda(self):
             code=export_lambda_image,
             environment={
                 "OUTPUT_S3_BUCKET": self.OUTPUT_S3_BUCKET,
-                "SECRET_NAME": self.SECRET_MANAGER_NAME
             },
             role=export_lambda_role,
             timeout=Duration.minutes(15),
@@ -1,72 +1,58 @@
 import os
-import json
+import threading
 import boto3
-from botocore.exceptions import BotoCoreError, ClientError
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
 from utils.logger import get_logger
-from utils.exceptions import exception_handler, ExportLambdaError
 
 logger = get_logger("connections")
 
+# 所有 boto3 client 共用的連線設定
+client_config = Config(
+    connect_timeout=2,
+    read_timeout=10,
+    retries={
+        "max_attempts": 3,
+        "mode": "adaptive"  # 自適應重試，避免節流時集中重試
+    },
+    max_pool_connections=50,  # 提高連接池大小，避免並發匯出時丟棄連線
+    tcp_keepalive=True
+)
+
+# 上傳匯出檔：超過 5MB 即以 5MB 分段、多執行緒並行上傳
+transfer_config = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True
+)
+
 class Connections:
     """AWS connection helper"""
 
     region_name = os.getenv("AWS_REGION", "ap-southeast-1")
-    secret_name = os.getenv("SECRET_NAME")
     s3_bucket_name = os.getenv("OUTPUT_S3_BUCKET")
 
-    _secret_cache = None
-    _creds_cache = None
-    _s3_client = None
-
-    @classmethod
-    @exception_handler
-    def get_secret(cls) -> dict:
-        if cls._secret_cache is not None:
-            return cls._secret_cache
-
-        if not cls.secret_name:
-            logger.error("SECRET_NAME environment variable not set")
-            raise ValueError("Environment variable SECRET_NAME is not set")
+    transfer_config = transfer_config
 
-        try:
-            sm = boto3.client("secretsmanager", region_name=cls.region_name)
-            resp = sm.get_secret_value(SecretId=cls.secret_name)
-            cls._secret_cache = json.loads(resp["SecretString"])
-            logger.info(f"Successfully retrieved secret {cls.secret_name}")
-            return cls._secret_cache
-
-        except (ClientError, BotoCoreError) as err:
-            logger.exception("Failed to retrieve AWS secret")
-            raise ExportLambdaError(f"Failed to retrieve secret '{cls.secret_name}'") from err
-
-    @classmethod
-    @exception_handler
-    def get_credentials(cls) -> dict:
-        if cls._creds_cache is not None:
-            return cls._creds_cache
-
-        secret = cls.get_secret()
-        cls._creds_cache = {
-            "access_key": secret.get("AWS_ACCESS_KEY_ID"),
-            "secret_key": secret.get("AWS_SECRET_ACCESS_KEY"),
-            "session_token": secret.get("AWS_SESSION_TOKEN"),
-        }
-        logger.info("AWS credentials extracted successfully")
-        return cls._creds_cache
+    _s3_client = None
+    _lock = threading.Lock()
 
     @classmethod
-    @exception_handler
     def s3_client(cls):
         if cls._s3_client is not None:
             return cls._s3_client
 
-        creds = cls.get_credentials()
-        cls._s3_client = boto3.client(
-            "s3",
-            region_name=cls.region_name,
-            aws_access_key_id=creds["access_key"],
-            aws_secret_access_key=creds["secret_key"],
-            aws_session_token=creds["session_token"],
-        )
-        logger.info("S3 client initialized successfully")
-        return cls._s3_client
\ No newline at end of file
+        # double-checked locking：只有首次建立時才需要取得鎖
+        with cls._lock:
+            if cls._s3_client is not None:
+                return cls._s3_client
+
+            # 直接使用 Lambda 執行角色的憑證（會自動輪替），不再從 Secrets Manager 讀取
+            cls._s3_client = boto3.client(
+                "s3",
+                region_name=cls.region_name,
+                config=client_config,
+            )
+            logger.info("S3 client initialized successfully")
+        return cls._s3_client
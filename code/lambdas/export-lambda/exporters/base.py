@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from utils.helpers import build_cover
 
+# 寫出匯出檔時使用的緩衝區大小，讓 zip/PDF 的大量小寫入合併成少數幾次系統呼叫
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
 class Exporter(ABC):
     """
     所有檔案格式導出的基礎類別。
@@ -13,12 +17,26 @@ def __init__(self, content_dict: dict, company_info: dict):
         self.company_info = company_info
         self.title, self.period, self.extra = build_cover(company_info)
 
+    @staticmethod
+    def open_output(file_path):
+        """
+        開啟輸出目標，供各格式的 save/build 直接寫入。
+
+        傳入路徑時以 1MB 緩衝區開啟檔案；傳入可寫入的二進位串流時清空後直接沿用，
+        離開 with 區塊時不會關閉串流，由呼叫端繼續讀取。
+        """
+        if hasattr(file_path, 'write'):
+            file_path.seek(0)
+            file_path.truncate()
+            return nullcontext(file_path)
+        return open(file_path, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+
     @abstractmethod
-    def export(self, file_path: str):
+    def export(self, file_path):
         """
-        將內容導出到指定的檔案路徑。
+        將內容導出到指定的檔案路徑或二進位串流。
 
         Args:
-            file_path (str): 要輸出的完整檔案路徑。
+            file_path (str | BinaryIO): 要輸出的完整檔案路徑，或可寫入的二進位串流。
         """
         pass
@@ -71,22 +71,334 @@
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.section import WD_ORIENT
 from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import qn, nsdecls
 from docx.opc.constants import RELATIONSHIP_TYPE
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from bs4 import BeautifulSoup
+from docx.opc.phys_pkg import _ZipPkgWriter
+from docx.text.run import Run
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from xml.sax.saxutils import escape
 import io
 import re
-import requests
+import json
+import copy
+import struct
+import zipfile
 import base64
-from PIL import Image
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from datetime import datetime
 from utils.logger import get_logger
 
 logger = get_logger("docx_exporter")
 
+# 同時下載與預處理圖片的最大執行緒數
+IMAGE_DOWNLOAD_WORKERS = 8
+
+# 同時解碼與預處理圖表圖片的最大執行緒數（PIL 解碼/縮放會釋放 GIL）
+CHART_PREPARE_WORKERS = 4
+
+# 頁碼域代碼，parse_xml 後將子元素加入 run
+PAGE_FIELD_XML = (
+    f'<w:r {nsdecls("w")}>'
+    '<w:fldChar w:fldCharType="begin"/>'
+    '<w:instrText xml:space="preserve">PAGE</w:instrText>'
+    '<w:fldChar w:fldCharType="end"/>'
+    '</w:r>'
+)
+
+# 目錄域代碼，使用更完整的TOC指令，並添加默認的目錄內容提示
+TOC_FIELD_XML = (
+    f'<w:r {nsdecls("w")}>'
+    '<w:fldChar w:fldCharType="begin"/>'
+    '<w:instrText xml:space="preserve">TOC \\o "1-3" \\h \\z \\t "Heading 1,1,Heading 2,2,Heading 3,3"</w:instrText>'
+    '<w:fldChar w:fldCharType="separate"/>'
+    '<w:t>請在Word中按F9鍵更新目錄</w:t>'
+    '<w:fldChar w:fldCharType="end"/>'
+    '</w:r>'
+)
+
+def _write_docx_part(self, pack_uri, blob):
+    """
+    取代 python-docx 預設的 zip 寫入（全部 ZIP_DEFLATED level 6）：
+    圖片本身已是壓縮格式，直接存放不再壓縮；XML 等其餘部件使用最快的壓縮等級。
+    """
+    if pack_uri.startswith('/word/media/'):
+        self._zipf.writestr(pack_uri.membername, blob, compress_type=zipfile.ZIP_STORED)
+    else:
+        self._zipf.writestr(pack_uri.membername, blob, compresslevel=1)
+
+
+_ZipPkgWriter.write = _write_docx_part
+
+# HTML 解析器：優先使用 lxml（C 實作），未安裝時退回內建的 html.parser
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+# process_html_content 需要處理的區塊標籤（文字節點的 name 為 None，不會命中）
+CONTENT_TAGS = frozenset(('h1', 'h2', 'h3', 'p', 'ul', 'ol', 'img', 'table', 'blockquote', 'pre', 'code', 'div'))
+
+# 只建立 CONTENT_TAGS 的節點（含其內容），其餘標籤如 script/style/span 外層不建立
+CONTENT_STRAINER = SoupStrainer(list(CONTENT_TAGS))
+
+# Plotly 圖表的腳本另外只解析 script 標籤
+SCRIPT_STRAINER = SoupStrainer('script')
+
+# 下載圖片的請求頭，模仿瀏覽器行為
+IMAGE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br'
+}
+
+# 錯誤提示段落：置中、紅色、10pt，一次 parse_xml 產生整個段落
+ERROR_PLACEHOLDER_XML = (
+    '<w:p %s><w:pPr><w:jc w:val="center"/></w:pPr>'
+    '<w:r><w:rPr><w:color w:val="FF0000"/><w:sz w:val="20"/></w:rPr>'
+    '<w:t xml:space="preserve">[%s]</w:t></w:r></w:p>'
+)
+
+# 標題開頭的重複章節編號，例如 "1. 2. "
+HEADING_NUMBER_RE = re.compile(r'^\d+\.\s*\d+\.\s*')
+
+# Plotly.newPlot("div_id", data, layout) 的參數
+PLOTLY_NEWPLOT_RE = re.compile(r'Plotly\.newPlot\s*\(\s*["\']([^"\']+)["\'],\s*(\[.*?\]),\s*(\{.*?\})', re.DOTALL)
+
+# Plotly.newPlot 呼叫所對應的 div id
+PLOTLY_DIV_ID_RE = re.compile(r'Plotly\.newPlot\s*\(\s*["\']([^"\']+)')
+
+# Word 圖表佔位符 [WORD_CHART_<chart_id>]
+WORD_CHART_PLACEHOLDER_RE = re.compile(r'\[WORD_CHART_([^\]]+)\]')
+
+# 圖片最大寬度 15cm，換算為 96 DPI 下的像素（1cm ≈ 37.795 pixels）
+MAX_IMAGE_WIDTH_PX = 15 * 37.795
+
+# 圖片檔頭 magic bytes 與對應格式（涵蓋 PIL 能解碼、過去可經轉檔嵌入的格式）
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'\x00\x00\x01\x00', 'ico'),
+    (b'\x00\x00\x02\x00', 'cur'),
+    (b'\x00\x00\x00\x0cjP  \r\n\x87\n', 'jpeg2000'),
+    (b'\xff\x4f\xff\x51', 'jpeg2000'),
+)
+
+
+def _element_text(element) -> str:
+    """
+    取得元素文字；只有單一文字節點（如 <strong>foo</strong>）時直接取用，
+    不經過 get_text 的遞迴走訪。
+    """
+    contents = element.contents
+    if not contents:
+        return ''
+    if len(contents) == 1 and type(contents[0]) is NavigableString:
+        return str(contents[0])
+    return element.get_text()
+
+
+def _b64_decoded_size(b64_str) -> int:
+    """由 base64 字串長度推算解碼後的位元組數（不實際解碼）"""
+    if not isinstance(b64_str, (str, bytes)) or not b64_str:
+        return 0
+    tail = b64_str[-2:]
+    padding = tail.count('=' if isinstance(tail, str) else b'=')
+    return max(len(b64_str) * 3 // 4 - padding, 0)
+
+
+def _png_dimensions(data: bytes):
+    """從 PNG 的 IHDR 區塊讀取 (寬, 高)，不解碼圖片；非 PNG 時回傳 None"""
+    if len(data) < 24 or not data.startswith(b'\x89PNG\r\n\x1a\n') or data[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', data[16:24])
+
+
+def _sniff_image(data: bytes):
+    """依檔頭判斷圖片格式，回傳 IMAGE_SIGNATURES 中的格式名稱或 'webp'，無法辨識時回傳 None"""
+    for signature, format_name in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return format_name
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+# 定義顏色
+COLORS = {
+    'deep_blue': RGBColor(0, 51, 102),  # #003366
+    'gray_blue': RGBColor(51, 102, 153),  # #336699
+    'black': RGBColor(0, 0, 0),
+    'gray': RGBColor(204, 204, 204),  # #CCCCCC
+    'light_gray': RGBColor(242, 242, 242),  # #F2F2F2
+    'code_bg': RGBColor(244, 244, 244)  # #F4F4F4
+}
+
+# 顏色的十六進制字串（如 'CCCCCC'），供直接寫入 XML 屬性使用
+HEX_COLORS = {key: str(color) for key, color in COLORS.items()}
+
+# 定義字體設定
+FONTS = {
+    'title': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(16), 'bold': True, 'color': COLORS['deep_blue']},
+    'h1': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(16), 'bold': True, 'color': COLORS['deep_blue']},
+    'h2': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(14), 'bold': True, 'color': COLORS['gray_blue']},
+    'h3': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(12), 'bold': True, 'color': COLORS['black']},
+    'normal': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(11), 'bold': False, 'color': COLORS['black']},
+    'caption': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(10), 'bold': False, 'color': COLORS['black']},
+    'header_footer': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(9), 'bold': False, 'color': COLORS['black']},
+    'code': {'name': 'Consolas', 'size': Pt(10), 'bold': False, 'color': COLORS['black']}
+}
+
+# 常用樣式的衍生版本（粗體、斜體、底線、表頭、封面標題）
+STYLES = dict(
+    FONTS,
+    normal_bold={**FONTS['normal'], 'bold': True},
+    normal_italic={**FONTS['normal'], 'italic': True},
+    normal_underline={**FONTS['normal'], 'underline': True},
+    table_header={'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(11), 'bold': True},
+    cover_title={'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(24), 'bold': True, 'color': COLORS['deep_blue']},
+)
+
+# 定義段落設定
+PARAGRAPH_SETTINGS = {
+    'alignment': WD_ALIGN_PARAGRAPH.JUSTIFY,
+    'space_before': Pt(6),
+    'space_after': Pt(6),
+    'line_spacing': 1.5,
+    'first_line_indent': Cm(0.75)  # 約2字元
+}
+
+# 引用、程式碼區塊與清單的固定長度，預先換算為 EMU 避免每段重新建立
+BLOCK_INDENT = Cm(1)
+BLOCK_SPACING = Pt(12)
+LIST_INDENT = Cm(0.5)
+LIST_HANGING_INDENT = Cm(-0.5)
+LIST_SPACING = Pt(6)
+
+# 錯誤提示文字顏色（紅色）
+ERROR_COLOR = RGBColor(255, 0, 0)
+
+
+def _rpr_children(style_dict, english=False) -> str:
+    """將字體設定轉為 <w:rPr> 內的子元素 XML，順序依 schema（rFonts, b, i, color, sz, u）"""
+    name = style_dict.get('name_zh', style_dict.get('name'))
+    if english:
+        name = style_dict.get('name_en', name)
+
+    rpr = []
+    if name is not None:
+        rpr.append(f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}"/>')
+    if 'bold' in style_dict:
+        rpr.append('<w:b/>' if style_dict['bold'] else '<w:b w:val="0"/>')
+    if 'italic' in style_dict:
+        rpr.append('<w:i/>' if style_dict['italic'] else '<w:i w:val="0"/>')
+    if 'color' in style_dict:
+        rpr.append(f'<w:color w:val="{style_dict["color"]}"/>')
+    if 'size' in style_dict:
+        rpr.append(f'<w:sz w:val="{int(style_dict["size"].pt * 2)}"/>')  # 單位為半點
+    if style_dict.get('underline'):
+        rpr.append('<w:u w:val="single"/>')
+    return ''.join(rpr)
+
+
+@lru_cache(maxsize=64)
+def _rpr_template(style_items: tuple, english: bool):
+    """
+    依字體設定（以排序後的 items tuple 作為快取鍵）產生 <w:rPr> 模板，
+    每種設定只 parse 一次；呼叫端需 deepcopy 後再插入。
+    """
+    return parse_xml(f'<w:rPr {nsdecls("w")}>{_rpr_children(dict(style_items), english)}</w:rPr>')
+
+
+def _apply_rpr(run, template):
+    """以模板取代 run 的 <w:rPr>，省去 python-docx 逐一呼叫 font 屬性 setter"""
+    r = run._r
+    existing = r.rPr
+    if existing is not None:
+        r.remove(existing)
+    r.insert(0, copy.deepcopy(template))
+
+
+def _compile_style(style_dict):
+    """
+    將字體設定預先轉為中、英文兩份 <w:rPr> 模板並回傳套用函式，
+    效果等同 DocxExporter.apply_text_formatting。
+    """
+    items = tuple(sorted(style_dict.items()))
+    templates = {english: _rpr_template(items, english) for english in (False, True)}
+
+    def apply(run, is_english=False):
+        _apply_rpr(run, templates[bool(is_english)])
+
+    return apply
+
+
+@lru_cache(maxsize=64)
+def _build_rpr(style_key: str, english: bool) -> bytes:
+    """
+    產生與 apply_text_formatting 相同格式的 <w:r> 開頭（含 <w:rPr> 與 <w:t> 起始標籤），
+    以 UTF-8 bytes 回傳；每種 (樣式, 是否英文) 只組一次，之後只需接上跳脫後的文字與 RUN_SUFFIX。
+    """
+    rpr = _rpr_children(STYLES[style_key], english)
+    return f'<w:r {nsdecls("w")}><w:rPr>{rpr}</w:rPr><w:t xml:space="preserve">'.encode('utf-8')
+
+
+RUN_SUFFIX = b'</w:t></w:r>'
+
+
+@lru_cache(maxsize=16)
+def _tbl_borders_template(border_type: str, border_size: int, border_color: str):
+    """產生表格層級的 <w:tblBorders> 模板（外框與內部格線），呼叫端需 deepcopy 後再插入"""
+    if border_type == 'nil':
+        attrs = 'w:val="nil"'
+    else:
+        attrs = f'w:val="{border_type}" w:sz="{border_size}" w:space="0" w:color="{border_color}"'
+    edges = ''.join(
+        f'<w:{edge} {attrs}/>'
+        for edge in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+    )
+    return parse_xml(f'<w:tblBorders {nsdecls("w")}>{edges}</w:tblBorders>')
+
+
+def _build_run_xml(style_key: str, text: str, is_english: bool = False) -> bytes:
+    """組出單一文字 run 的完整 XML；與 python-docx 的 add_run 一致，tab 轉 <w:tab/>，換行轉 <w:br/>"""
+    body = escape(text)
+    if '\t' in body or '\n' in body or '\r' in body:
+        body = (body.replace('\t', '</w:t><w:tab/><w:t xml:space="preserve">')
+                    .replace('\r\n', '\n').replace('\r', '\n')
+                    .replace('\n', '</w:t><w:br/><w:t xml:space="preserve">'))
+    return _build_rpr(style_key, is_english) + body.encode('utf-8') + RUN_SUFFIX
+
+
+# 行內格式標籤對應的衍生樣式
+INLINE_STYLE_KEYS = {
+    'strong': 'normal_bold', 'b': 'normal_bold',
+    'em': 'normal_italic', 'i': 'normal_italic',
+    'u': 'normal_underline',
+}
+
+# 整段一次 parse 時使用的 <w:p> 外框（含超連結需要的 r 命名空間）
+PARAGRAPH_PREFIX = f'<w:p {nsdecls("w", "r")}>'.encode('utf-8')
+PARAGRAPH_SUFFIX = b'</w:p>'
+
+# 內文段落格式，效果等同以 PARAGRAPH_SETTINGS 呼叫 apply_paragraph_settings
+BODY_PPR_XML = (
+    f'<w:pPr><w:spacing w:before="{PARAGRAPH_SETTINGS["space_before"].twips}" '
+    f'w:after="{PARAGRAPH_SETTINGS["space_after"].twips}" '
+    f'w:line="{int(PARAGRAPH_SETTINGS["line_spacing"] * 240)}" w:lineRule="auto"/>'
+    f'<w:ind w:firstLine="{PARAGRAPH_SETTINGS["first_line_indent"].twips}"/>'
+    f'<w:jc w:val="both"/></w:pPr>'
+).encode('utf-8')
+
+
+# 預先編譯每種樣式的套用函式，避免每個 run 重複查詢 dict
+STYLE_APPLIERS = {key: _compile_style(style) for key, style in STYLES.items()}
+
 class DocxExporter(Exporter):
     """
     專門處理 Docx (.docx) 檔案匯出的類別。
@@ -94,6 +406,13 @@ class DocxExporter(Exporter):
     支援Word圖表佔位符處理和自動目錄生成。
     """
 
+    # 樣式設定皆為不可變常數，所有實例共用
+    colors = COLORS
+    fonts = FONTS
+    _hex_colors = HEX_COLORS
+    paragraph_settings = PARAGRAPH_SETTINGS
+    _appliers = STYLE_APPLIERS
+
     def __init__(self, 
                  content_dict: dict, 
                  company_info: dict, 
@@ -106,36 +425,25 @@ def __init__(self,
         self.charts_data = charts_data or {}
         self.charts_position_info = charts_position_info or {}
         
-        # 定義顏色
-        self.colors = {
-            'deep_blue': RGBColor(0, 51, 102),  # #003366
-            'gray_blue': RGBColor(51, 102, 153),  # #336699
-            'black': RGBColor(0, 0, 0),
-            'gray': RGBColor(204, 204, 204),  # #CCCCCC
-            'light_gray': RGBColor(242, 242, 242),  # #F2F2F2
-            'code_bg': RGBColor(244, 244, 244)  # #F4F4F4
-        }
+        # 快取的頁首頁尾 XML，供後續章節直接複製
+        self._header_xml = None
+        self._footer_xml = None
+        
+        # 預先解碼與處理的圖表 {chart_id: Future[(img_static, prepared)]}，以及處理用的執行緒池
+        self._chart_futures = {}
+        self._chart_executor = None
+        
+        # chart_id -> 圖表位置信息的索引，以及建立索引時的來源
+        self._chart_index = {}
+        self._chart_index_source = None
         
-        # 定義字體設定
-        self.fonts = {
-            'title': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(16), 'bold': True, 'color': self.colors['deep_blue']},
-            'h1': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(16), 'bold': True, 'color': self.colors['deep_blue']},
-            'h2': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(14), 'bold': True, 'color': self.colors['gray_blue']},
-            'h3': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(12), 'bold': True, 'color': self.colors['black']},
-            'normal': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(11), 'bold': False, 'color': self.colors['black']},
-            'caption': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(10), 'bold': False, 'color': self.colors['black']},
-            'header_footer': {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(9), 'bold': False, 'color': self.colors['black']},
-            'code': {'name': 'Consolas', 'size': Pt(10), 'bold': False, 'color': self.colors['black']}
-        }
+        # 原始 HTML 與延遲建立的 {div_id: Plotly 腳本} 對照表
+        self._html_source = None
+        self._plotly_scripts = None
         
-        # 定義段落設定
-        self.paragraph_settings = {
-            'alignment': WD_ALIGN_PARAGRAPH.JUSTIFY,
-            'space_before': Pt(6),
-            'space_after': Pt(6),
-            'line_spacing': 1.5,
-            'first_line_indent': Cm(0.75)  # 約2字元
-        }
+        # 預先下載的 URL 圖片 {url: Response 或 Exception}
+        self._img_cache = {}
+        self._session = None
 
     @staticmethod
     def enable_field_update_on_open(document):
@@ -151,24 +459,37 @@ def enable_field_update_on_open(document):
             settings.append(update)
 
     def apply_text_formatting(self, run, style_dict, is_english=False):
-        """套用文字格式，根據中英文選擇不同字體"""
-        if is_english and 'name_en' in style_dict:
-            run.font.name = style_dict['name_en']
-        elif 'name_zh' in style_dict:
-            run.font.name = style_dict['name_zh']
-        elif 'name' in style_dict:
-            run.font.name = style_dict['name']
-            
-        if 'size' in style_dict:
-            run.font.size = style_dict['size']
-        if 'bold' in style_dict:
-            run.font.bold = style_dict['bold']
-        if 'italic' in style_dict:
-            run.font.italic = style_dict['italic']
-        if 'color' in style_dict:
-            run.font.color.rgb = style_dict['color']
-        if 'underline' in style_dict and style_dict['underline']:
-            run.font.underline = True
+        """套用文字格式，根據中英文選擇不同字體（相同設定的 <w:rPr> 只建立一次）"""
+        _apply_rpr(run, _rpr_template(tuple(sorted(style_dict.items())), bool(is_english)))
+
+    def _append_run(self, paragraph, text, style_key, is_english=False):
+        """
+        以預先組好的 XML 模板直接建立 run 並加到段落末端，
+        跳過 python-docx 逐一建立 Run/Font/Color 物件的成本。
+        """
+        r = parse_xml(_build_run_xml(style_key, text, is_english))
+        paragraph._p.append(r)
+        return Run(r, paragraph)
+
+    def _emit_paragraph(self, doc, spans, ppr_xml=BODY_PPR_XML):
+        """
+        將整段的 spans 組成單一 <w:p> XML，一次 parse 後插入文檔，
+        不經過 python-docx 的 Paragraph/Run 物件。spans 由 _collect_spans 產生。
+        """
+        p = parse_xml(PARAGRAPH_PREFIX + ppr_xml + self._spans_xml(doc.part, spans) + PARAGRAPH_SUFFIX)
+        doc.element.body._insert_p(p)
+        return p
+
+    def _spans_xml(self, part, spans):
+        """將 (樣式, 文字, 是否英文, 超連結) spans 轉為 run XML；有超連結時外包 <w:hyperlink>"""
+        chunks = []
+        for style_key, text, is_english, href in spans:
+            run_xml = _build_run_xml(style_key, text, is_english)
+            if href:
+                r_id = part.relate_to(href, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+                run_xml = b'<w:hyperlink r:id="' + r_id.encode('utf-8') + b'">' + run_xml + b'</w:hyperlink>'
+            chunks.append(run_xml)
+        return b''.join(chunks)
 
     def apply_paragraph_settings(self, paragraph, settings=None):
         """套用段落格式"""
@@ -209,9 +530,33 @@ def setup_document(self, doc):
         self.enable_field_update_on_open(doc)
     
     def setup_header_footer(self, doc):
-        """設定頁首和頁尾"""
-        section = doc.sections[0]
+        """
+        設定頁首和頁尾。表格只在第一次實際建立，之後的章節（或文件）
+        直接複製快取的頁首頁尾 XML，不再重跑 add_table/add_run/清除邊框。
+        """
+        sections = list(doc.sections)
+        if self._header_xml is None:
+            section = sections.pop(0)
+            self._build_header_footer(section)
+            self._header_xml = copy.deepcopy(section.header._element)
+            self._footer_xml = copy.deepcopy(section.footer._element)
         
+        for section in sections:
+            self._clone_header_footer(section.header, self._header_xml)
+            self._clone_header_footer(section.footer, self._footer_xml)
+
+    @staticmethod
+    def _clone_header_footer(header_footer, cached_xml):
+        """以快取的 XML 取代頁首/頁尾內容"""
+        header_footer.is_linked_to_previous = False
+        element = header_footer._element
+        for child in list(element):
+            element.remove(child)
+        for child in cached_xml:
+            element.append(copy.deepcopy(child))
+
+    def _build_header_footer(self, section):
+        """在指定章節建立頁首（標題、日期）與頁尾（公司名稱、頁碼）"""
         # 設定頁首
         header = section.header
         header_table = header.add_table(1, 2, Cm(16))
@@ -223,19 +568,17 @@ def setup_header_footer(self, doc):
         title_p = title_cell.paragraphs[0]
         title_p.alignment = WD_ALIGN_PARAGRAPH.LEFT
         title_run = title_p.add_run(self.title)
-        self.apply_text_formatting(title_run, self.fonts['header_footer'])
+        self._appliers['header_footer'](title_run)
         
         # 右側：日期
         date_cell = header_table.cell(0, 1)
         date_p = date_cell.paragraphs[0]
         date_p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
         date_run = date_p.add_run(datetime.now().strftime('%Y/%m/%d'))
-        self.apply_text_formatting(date_run, self.fonts['header_footer'])
+        self._appliers['header_footer'](date_run)
         
         # 清除表格邊框
-        for row in header_table.rows:
-            for cell in row.cells:
-                self.clear_cell_border(cell)
+        self.clear_table_border(header_table)
         
         # 設定頁尾
         footer = section.footer
@@ -248,35 +591,23 @@ def setup_header_footer(self, doc):
         company_p.alignment = WD_ALIGN_PARAGRAPH.LEFT
         company_name = self.company_info.get("企業名稱", "產業研究報告")
         company_run = company_p.add_run(company_name)
-        self.apply_text_formatting(company_run, self.fonts['header_footer'])
+        self._appliers['header_footer'](company_run)
         
         # 右側：頁碼
         page_cell = footer_table.cell(0, 1)
         page_p = page_cell.paragraphs[0]
         page_p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
         page_text = page_p.add_run("第 ")
-        self.apply_text_formatting(page_text, self.fonts['header_footer'])
+        self._appliers['header_footer'](page_text)
         
         # 添加頁碼域代碼
-        fldChar1 = OxmlElement('w:fldChar')
-        fldChar1.set(qn('w:fldCharType'), 'begin')
-        instrText = OxmlElement('w:instrText')
-        instrText.set(qn('xml:space'), 'preserve')
-        instrText.text = "PAGE"
-        fldChar2 = OxmlElement('w:fldChar')
-        fldChar2.set(qn('w:fldCharType'), 'end')
-        
-        page_text._r.append(fldChar1)
-        page_text._r.append(instrText)
-        page_text._r.append(fldChar2)
+        page_text._r.extend(list(parse_xml(PAGE_FIELD_XML)))
         
         page_end = page_p.add_run(" 頁")
-        self.apply_text_formatting(page_end, self.fonts['header_footer'])
+        self._appliers['header_footer'](page_end)
         
         # 清除表格邊框
-        for row in footer_table.rows:
-            for cell in row.cells:
-                self.clear_cell_border(cell)
+        self.clear_table_border(footer_table)
 
     def create_cover_page(self, doc):
         """創建封面頁"""
@@ -284,7 +615,7 @@ def create_cover_page(self, doc):
         title_para = doc.add_paragraph()
         title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         title_run = title_para.add_run(self.title)
-        self.apply_text_formatting(title_run, {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(24), 'bold': True, 'color': self.colors['deep_blue']})
+        self._appliers['cover_title'](title_run)
         
         # 添加空白行
         for _ in range(5):
@@ -295,13 +626,13 @@ def create_cover_page(self, doc):
         brand_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         brand_text = f"品牌: {self.company_info.get('品牌名稱', '')}"
         brand_run = brand_para.add_run(brand_text)
-        self.apply_text_formatting(brand_run, self.fonts['h2'])
+        self._appliers['h2'](brand_run)
         
         product_para = doc.add_paragraph()
         product_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         product_text = f"商品: {self.company_info.get('商品名稱', '')}"
         product_run = product_para.add_run(product_text)
-        self.apply_text_formatting(product_run, self.fonts['h2'])
+        self._appliers['h2'](product_run)
         
         # 添加空白行
         for _ in range(5):
@@ -312,7 +643,7 @@ def create_cover_page(self, doc):
         date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         date_text = f"製作日期: {datetime.now().strftime('%Y年%m月%d日')}"
         date_run = date_para.add_run(date_text)
-        self.apply_text_formatting(date_run, self.fonts['normal'])
+        self._appliers['normal'](date_run)
         
         # 添加分頁符
         doc.add_page_break()
@@ -326,7 +657,7 @@ def add_toc_with_proper_styles(self, doc):
             
             # 修改目錄標題樣式
             for run in toc_heading.runs:
-                self.apply_text_formatting(run, self.fonts['h1'])
+                self._appliers['h1'](run)
             
             # 添加空白段落
             doc.add_paragraph()
@@ -338,35 +669,12 @@ def add_toc_with_proper_styles(self, doc):
             para.style = 'Normal'
             para.alignment = WD_ALIGN_PARAGRAPH.LEFT
             
-            # 創建TOC的XML元素
-            fldChar1 = OxmlElement('w:fldChar')
-            fldChar1.set(qn('w:fldCharType'), 'begin')
-            
-            instrText = OxmlElement('w:instrText')
-            instrText.set(qn('xml:space'), 'preserve')
-            # 使用更完整的TOC指令
-            instrText.text = 'TOC \\o "1-3" \\h \\z \\t "Heading 1,1,Heading 2,2,Heading 3,3"'
-            
-            fldChar2 = OxmlElement('w:fldChar')
-            fldChar2.set(qn('w:fldCharType'), 'separate')
-            
-            # 添加默認的目錄內容提示
-            t = OxmlElement('w:t')
-            t.text = "請在Word中按F9鍵更新目錄"
-            
-            fldChar3 = OxmlElement('w:fldChar')  
-            fldChar3.set(qn('w:fldCharType'), 'end')
-            
-            # 將所有元素添加到段落的run中
+            # 將TOC域代碼（含默認的目錄內容提示）添加到段落的run中
             run = para.add_run()
-            run._r.append(fldChar1)
-            run._r.append(instrText)
-            run._r.append(fldChar2)
-            run._r.append(t)
-            run._r.append(fldChar3)
+            run._r.extend(list(parse_xml(TOC_FIELD_XML)))
             
             # 設置字體
-            self.apply_text_formatting(run, self.fonts['normal'])
+            self._appliers['normal'](run)
             
             # 添加目錄說明
             note_para = doc.add_paragraph()
@@ -425,254 +733,286 @@ def add_simple_toc(self, doc):
         except Exception as e:
             logger.error(f"創建簡化目錄失敗: {e}")
 
-    def process_vanna_static_image(self, doc, img_static: bytes, title_text: str):
-        """處理 Vanna 生成的靜態圖片 (bytes)"""
+    def _prepare_image(self, raw: bytes):
+        """
+        解碼、轉換並縮放圖片，回傳 (processed_stream, final_width)。
+        不操作 doc，因此可以在背景執行緒中執行（PIL 的解碼/縮放/編碼會釋放 GIL）。
+        """
+        # 8-bit RGB 且寬度未超過上限的 PNG 只需讀 IHDR，完全不經過 PIL
+        dimensions = _png_dimensions(raw)
+        if dimensions and dimensions[0] <= MAX_IMAGE_WIDTH_PX and raw[24:26] == b'\x08\x02':
+            logger.info(f"PNG 圖片無需處理 ({dimensions[0]}x{dimensions[1]})，直接使用原始資料")
+            return io.BytesIO(raw), dimensions[0]
+        
+        # PIL 只在有圖片時才載入，純文字報告不需負擔匯入時間
+        from PIL import Image
+        
+        with Image.open(io.BytesIO(raw)) as pil_img:
+            # 檢查圖片格式和尺寸
+            format_name = pil_img.format
+            width, height = pil_img.size
+            logger.info(f"圖片資訊 - 格式: {format_name}, 尺寸: {width}x{height}, 模式: {pil_img.mode}")
+            
+            # 計算適合的尺寸
+            max_width_px = MAX_IMAGE_WIDTH_PX
+            
+            # 是否需要重新編碼（有轉換模式或縮放時才需要）
+            dirty = False
+            
+            # 過大的 JPEG 讓 libjpeg 直接以 1/2、1/4、1/8 比例解碼，省去完整解碼
+            if format_name == 'JPEG' and width > max_width_px:
+                pil_img.draft('RGB', (int(max_width_px), int(max_width_px * height / width)))
+                # draft 縮小後的寬度可能已不超過上限，此時不會再 resize，但仍需以縮小後的圖片重新編碼
+                if pil_img.size != (width, height):
+                    width, height = pil_img.size
+                    dirty = True
+            
+            # 非 RGB 模式一律轉換為 RGB
+            if pil_img.mode != 'RGB':
+                pil_img = pil_img.convert('RGB')
+                dirty = True
+            
+            if width > max_width_px:
+                # 計算縮放比例
+                scale = max_width_px / width
+                new_width = int(width * scale)
+                new_height = int(height * scale)
+                logger.info(f"圖片將被縮放到: {new_width}x{new_height}")
+                
+                # 重設大小
+                pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                dirty = True
+            
+            # 已符合條件的 PNG/JPEG 直接使用原始資料，不重新編碼
+            if not dirty and format_name in ('PNG', 'JPEG'):
+                logger.info(f"圖片無需處理，直接使用原始 {format_name} 資料")
+                return io.BytesIO(raw), width
+            
+            # 縮放後的尺寸即為最終尺寸，不需重新開啟圖片
+            final_width = pil_img.width
+            
+            # 將處理後的圖片保存到新的 BytesIO（不使用 optimize，省去重新計算 Huffman 表）
+            processed_stream = io.BytesIO()
+            save_format = 'PNG' if format_name in ('PNG', 'GIF') else 'JPEG'
+            pil_img.save(processed_stream, format=save_format, quality=85)
+            processed_stream.seek(0)
+            
+        logger.info(f"圖片預處理完成，保存格式: {save_format}")
+        return processed_stream, final_width
+
+    def _add_picture(self, doc, prepared, caption: str = None):
+        """將 _prepare_image 的結果插入文檔，caption 不為空時在圖片下方加入圖片說明"""
+        processed_stream, final_width = prepared
+        
+        # 轉換為 Word 的尺寸單位
+        display_width = Cm(min(15, final_width * 2.54 / 96))  # 96 DPI 轉 cm
+        
+        # 添加圖片段落並插入圖片
+        img_paragraph = doc.add_paragraph()
+        img_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        img_paragraph.add_run().add_picture(processed_stream, width=display_width)
+        logger.info(f"成功添加圖片到文檔，顯示寬度: {display_width}")
+        
+        # 添加圖片說明
+        if caption:
+            caption_para = doc.add_paragraph()
+            caption_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            caption_run = caption_para.add_run(f"圖: {caption}")
+            self._appliers['caption'](caption_run)
+            logger.info(f"添加圖片說明: {caption}")
+
+    def process_vanna_static_image(self, doc, img_static: bytes, title_text: str, prepared=None):
+        """
+        處理 Vanna 生成的靜態圖片 (bytes)。
+        prepared 為背景執行緒預先處理的結果（_prepare_image 的回傳值或其例外），未提供時即時處理。
+        """
         try:
-            if not img_static or len(img_static) == 0:
+            if not img_static:
                 logger.warning(f"圖表 {title_text} 的靜態圖片數據為空")
                 self.add_error_placeholder(doc, f"圖表數據缺失: {title_text}")
                 return
             
-            # 將bytes轉換為BytesIO流
-            img_stream = io.BytesIO(img_static)
-            img_stream.seek(0)
-            
-            # 使用PIL驗證和處理圖片
-            with Image.open(img_stream) as pil_img:
-                # 檢查圖片格式和尺寸
-                format_name = pil_img.format
-                width, height = pil_img.size
-                mode = pil_img.mode
-                
-                logger.info(f"Vanna圖表 - 格式: {format_name}, 尺寸: {width}x{height}, 模式: {mode}")
-                
-                # 如果圖片是 RGBA 或其他模式，轉換為 RGB
-                if mode in ('RGBA', 'LA', 'P'):
-                    logger.info(f"轉換圖片模式從 {mode} 到 RGB")
-                    pil_img = pil_img.convert('RGB')
-                
-                # 計算適合的尺寸
-                max_width_cm = 15  # 最大寬度 15cm
-                max_width_px = max_width_cm * 37.795  # 1cm ≈ 37.795 pixels at 96 DPI
-                
-                if width > max_width_px:
-                    # 計算縮放比例
-                    scale = max_width_px / width
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    logger.info(f"Vanna圖表將被縮放到: {new_width}x{new_height}")
-                    
-                    # 重設大小
-                    pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # 將處理後的圖片保存到新的 BytesIO
-                processed_stream = io.BytesIO()
-                save_format = 'PNG' if format_name in ('PNG', 'GIF') else 'JPEG'
-                pil_img.save(processed_stream, format=save_format, quality=85, optimize=True)
-                processed_stream.seek(0)
-                
-                logger.info(f"Vanna圖表預處理完成，保存格式: {save_format}")
-            
-            # 計算Word中的顯示尺寸
-            processed_stream.seek(0)
-            with Image.open(processed_stream) as final_img:
-                final_width, final_height = final_img.size
-                
-            # 轉換為 Word 的尺寸單位
-            display_width = Cm(min(15, final_width * 2.54 / 96))  # 96 DPI 轉 cm
-            
-            # 重置流位置並添加到文檔
-            processed_stream.seek(0)
-            
-            # 添加圖片段落
-            img_paragraph = doc.add_paragraph()
-            img_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # 插入圖片
-            run = img_paragraph.add_run()
-            inline_shape = run.add_picture(processed_stream, width=display_width)
+            if prepared is None:
+                prepared = self._prepare_image(img_static)
+            elif isinstance(prepared, Exception):
+                raise prepared
             
+            # 移除可能的後綴，如 "(發票數據)"
+            clean_title = title_text.replace("(發票數據)", "").strip() if title_text else ""
+            self._add_picture(doc, prepared, clean_title)
             logger.info(f"成功添加Vanna圖表到文檔: {title_text}")
             
-            # 添加圖片說明
-            if title_text and title_text.strip():
-                caption = doc.add_paragraph()
-                caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                # 移除可能的後綴，如 "(發票數據)"
-                clean_title = title_text.replace("(發票數據)", "").strip()
-                caption_run = caption.add_run(f"圖: {clean_title}")
-                self.apply_text_formatting(caption_run, self.fonts['caption'])
-                logger.info(f"添加Vanna圖表說明: {clean_title}")
-            
         except Exception as process_err:
             logger.error(f"Vanna圖表處理失敗: {process_err}")
             logger.error(f"錯誤詳情: {type(process_err).__name__}: {str(process_err)}")
             self.add_error_placeholder(doc, f"Vanna圖表處理失敗: {title_text}")
 
+    def _resolve_image_src(self, src):
+        """處理相對URL (如果有基礎URL)"""
+        if hasattr(self, 'base_url') and not (src.startswith('http://') or src.startswith('https://')):
+            if src.startswith('/'):
+                return f"{self.base_url.rstrip('/')}{src}"
+            return f"{self.base_url.rstrip('/')}/{src.lstrip('/')}"
+        return src
+
+    def _get_session(self):
+        """建立（或取得）共用的 requests.Session，連線池大小與下載執行緒數一致並自動重試"""
+        if self._session is None:
+            # requests 只在需要下載 URL 圖片時才載入
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            adapter = HTTPAdapter(
+                pool_connections=IMAGE_DOWNLOAD_WORKERS,
+                pool_maxsize=IMAGE_DOWNLOAD_WORKERS,
+                max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+            )
+            session = requests.Session()
+            session.headers.update(IMAGE_REQUEST_HEADERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def _download_image(self, src):
+        """下載單張圖片，所有下載共用同一個 requests.Session"""
+        response = self._get_session().get(src, allow_redirects=True, timeout=15)
+        response.raise_for_status()
+        return response
+
+    def _fetch_image(self, src):
+        """
+        在背景執行緒中下載並預處理圖片，回傳 (response, prepared)。
+        非圖片內容不預處理；預處理失敗時 prepared 為該例外，由 process_image 產生錯誤提示。
+        """
+        response = self._download_image(src)
+        content_type = response.headers.get('Content-Type', '')
+        if content_type and not content_type.startswith('image/'):
+            return response, None
+        # 無法辨識的格式留給 process_image 產生錯誤提示
+        if _sniff_image(response.content) is None:
+            return response, None
+        try:
+            prepared = self._prepare_image(response.content)
+        except Exception as prepare_err:
+            prepared = prepare_err
+        return response, prepared
+
+    def _prefetch_images(self, soup):
+        """
+        並行下載並預處理 HTML 中所有 URL 圖片，結果存入 self._img_cache 供 process_image 使用，
+        主執行緒只需把處理好的圖片插入文檔。
+        """
+        urls = set()
+        for img in soup.find_all('img'):
+            src = img.get('src')
+            if src and not src.startswith('data:image/'):
+                urls.add(self._resolve_image_src(src))
+        urls.difference_update(self._img_cache)
+        if not urls:
+            return
+
+        logger.info(f"並行下載 {len(urls)} 張圖片")
+        # 在主執行緒先建立 session，避免多個下載執行緒同時建立
+        self._get_session()
+        with ThreadPoolExecutor(max_workers=min(IMAGE_DOWNLOAD_WORKERS, len(urls))) as executor:
+            futures = {executor.submit(self._fetch_image, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    self._img_cache[url] = future.result()
+                except Exception as download_err:
+                    # 保留錯誤，交由 process_image 產生對應的錯誤提示
+                    self._img_cache[url] = download_err
+
     def process_image(self, doc, img_element):
         """處理圖片元素，支援 base64 和 URL 圖片"""
-        try:
-            src = img_element.get('src')
-            if not src:
-                logger.warning("圖片缺少src屬性")
+        src = img_element.get('src')
+        if not src:
+            logger.warning("圖片缺少src屬性")
+            return
+        
+        logger.info(f"開始處理圖片: {src[:100]}...")
+        
+        prepared = None
+        
+        # 處理 base64 圖片：只切出逗號後的資料直接解碼
+        if src.startswith('data:image/'):
+            logger.info("處理 base64 格式圖片")
+            comma = src.find(',')
+            if comma < 0:
+                self.add_error_placeholder(doc, "base64 圖片處理失敗: base64 格式不正確")
                 return
+            try:
+                image_data = base64.b64decode(src[comma + 1:])
+            except ValueError as b64_err:
+                logger.error(f"處理 base64 圖片失敗: {b64_err}")
+                self.add_error_placeholder(doc, f"base64 圖片處理失敗: {str(b64_err)}")
+                return
+            logger.info(f"base64 圖片解碼成功，大小: {len(image_data)} bytes")
+        
+        # 處理 URL 圖片：優先使用預先下載的結果，未命中時才即時下載
+        else:
+            from requests.exceptions import RequestException
             
-            logger.info(f"開始處理圖片: {src[:100]}...")
-            
-            img_stream = None
+            src = self._resolve_image_src(src)
+            logger.info(f"處理 URL 圖片: {src}")
             
-            # 處理 base64 圖片
-            if src.startswith('data:image/'):
+            cached = self._img_cache.get(src)
+            if cached is None:
                 try:
-                    logger.info("處理 base64 格式圖片")
-                    # 解析 base64 數據
-                    if ',' in src:
-                        header, data = src.split(',', 1)
-                        # 解碼 base64 數據
-                        image_data = base64.b64decode(data)
-                        img_stream = io.BytesIO(image_data)
-                        logger.info(f"base64 圖片解碼成功，大小: {len(image_data)} bytes")
-                    else:
-                        raise ValueError("base64 格式不正確")
-                        
-                except Exception as b64_err:
-                    logger.error(f"處理 base64 圖片失敗: {b64_err}")
-                    self.add_error_placeholder(doc, f"base64 圖片處理失敗: {str(b64_err)}")
-                    return
+                    cached = (self._download_image(src), None)
+                except RequestException as req_err:
+                    cached = req_err
             
-            # 處理 URL 圖片
-            else:
-                try:
-                    logger.info(f"處理 URL 圖片: {src}")
-                    # 處理相對URL (如果有基礎URL)
-                    if hasattr(self, 'base_url') and not (src.startswith('http://') or src.startswith('https://')):
-                        if src.startswith('/'):
-                            src = f"{self.base_url.rstrip('/')}{src}"
-                        else:
-                            src = f"{self.base_url.rstrip('/')}/{src.lstrip('/')}"
-                            
-                    # 設置請求頭，模仿瀏覽器行為
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                        'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
-                        'Accept-Encoding': 'gzip, deflate, br'
-                    }
-                    
-                    # 下載圖片
-                    response = requests.get(src, headers=headers, allow_redirects=True, timeout=15, stream=True)
-                    response.raise_for_status()
-                    
-                    # 檢查內容類型
-                    content_type = response.headers.get('Content-Type', '')
-                    logger.info(f"圖片 Content-Type: {content_type}")
-                    
-                    if content_type and not content_type.startswith('image/'):
-                        logger.warning(f"URL不是圖片: {src} (Content-Type: {content_type})")
-                        self.add_error_placeholder(doc, f"非圖片內容: {src}")
-                        return
-                        
-                    # 讀取圖片數據
-                    img_stream = io.BytesIO(response.content)
-                    logger.info(f"URL 圖片下載成功，大小: {len(response.content)} bytes")
-                    
-                except requests.exceptions.RequestException as req_err:
-                    logger.warning(f"下載圖片 {src} 失敗: {req_err}")
-                    self.add_error_placeholder(doc, f"圖片下載失敗: {src}")
-                    return
-                except Exception as url_err:
-                    logger.error(f"處理 URL 圖片失敗: {url_err}")
-                    self.add_error_placeholder(doc, f"URL 圖片處理失敗: {str(url_err)}")
-                    return
-            
-            # 處理圖片數據並添加到文檔
-            if img_stream:
-                try:
-                    # 先嘗試用 PIL 驗證圖片
-                    img_stream.seek(0)
-                    with Image.open(img_stream) as pil_img:
-                        # 檢查圖片格式
-                        format_name = pil_img.format
-                        width, height = pil_img.size
-                        mode = pil_img.mode
-                        
-                        logger.info(f"圖片資訊 - 格式: {format_name}, 尺寸: {width}x{height}, 模式: {mode}")
-                        
-                        # 如果圖片是 RGBA 或其他模式，轉換為 RGB
-                        if mode in ('RGBA', 'LA', 'P'):
-                            logger.info(f"轉換圖片模式從 {mode} 到 RGB")
-                            pil_img = pil_img.convert('RGB')
-                        
-                        # 計算適合的尺寸
-                        max_width_cm = 15  # 最大寬度 15cm
-                        max_width_px = max_width_cm * 37.795  # 1cm ≈ 37.795 pixels at 96 DPI
-                        
-                        if width > max_width_px:
-                            # 計算縮放比例
-                            scale = max_width_px / width
-                            new_width = int(width * scale)
-                            new_height = int(height * scale)
-                            logger.info(f"圖片將被縮放到: {new_width}x{new_height}")
-                            
-                            # 重設大小
-                            pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        
-                        # 將處理後的圖片保存到新的 BytesIO
-                        processed_stream = io.BytesIO()
-                        save_format = 'PNG' if format_name in ('PNG', 'GIF') else 'JPEG'
-                        pil_img.save(processed_stream, format=save_format, quality=85, optimize=True)
-                        processed_stream.seek(0)
-                        
-                        logger.info(f"圖片預處理完成，保存格式: {save_format}")
-                    
-                    # 計算Word中的顯示尺寸
-                    processed_stream.seek(0)
-                    with Image.open(processed_stream) as final_img:
-                        final_width, final_height = final_img.size
-                        
-                    # 轉換為 Word 的尺寸單位
-                    display_width = Cm(min(15, final_width * 2.54 / 96))  # 96 DPI 轉 cm
-                    
-                    # 重置流位置並添加到文檔
-                    processed_stream.seek(0)
-                    
-                    # 添加圖片段落
-                    img_paragraph = doc.add_paragraph()
-                    img_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # 插入圖片
-                    run = img_paragraph.add_run()
-                    inline_shape = run.add_picture(processed_stream, width=display_width)
-                    
-                    logger.info(f"成功添加圖片到文檔，顯示寬度: {display_width}")
-                    
-                    # 添加圖片說明（如果有alt屬性）
-                    alt_text = img_element.get('alt', '').strip()
-                    if alt_text:
-                        caption = doc.add_paragraph()
-                        caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        caption_run = caption.add_run(f"圖: {alt_text}")
-                        self.apply_text_formatting(caption_run, self.fonts['caption'])
-                        logger.info(f"添加圖片說明: {alt_text}")
-                    
-                except Exception as process_err:
-                    logger.error(f"圖片處理或添加失敗: {process_err}")
-                    logger.error(f"錯誤詳情: {type(process_err).__name__}: {str(process_err)}")
-                    self.add_error_placeholder(doc, f"圖片處理失敗: {str(process_err)}")
-                    
-        except Exception as e:
-            logger.error(f"處理圖片時發生未預期錯誤: {e}")
-            logger.error(f"錯誤類型: {type(e).__name__}")
-            self.add_error_placeholder(doc, f"圖片處理錯誤: {str(e)}")
+            if isinstance(cached, RequestException):
+                logger.warning(f"下載圖片 {src} 失敗: {cached}")
+                self.add_error_placeholder(doc, f"圖片下載失敗: {src}")
+                return
+            if isinstance(cached, Exception):
+                logger.error(f"處理 URL 圖片失敗: {cached}")
+                self.add_error_placeholder(doc, f"URL 圖片處理失敗: {str(cached)}")
+                return
+            response, prepared = cached
+            
+            # 檢查內容類型
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not content_type.startswith('image/'):
+                logger.warning(f"URL不是圖片: {src} (Content-Type: {content_type})")
+                self.add_error_placeholder(doc, f"非圖片內容: {src}")
+                return
+            
+            image_data = response.content
+            logger.info(f"URL 圖片下載成功，大小: {len(image_data)} bytes")
+        
+        if prepared is None:
+            # 先以檔頭判斷格式，無法辨識的資料不交給 PIL 解碼
+            if _sniff_image(image_data) is None:
+                logger.warning(f"無法辨識的圖片格式: {src[:100]}")
+                self.add_error_placeholder(doc, "圖片處理失敗: 無法辨識的圖片格式")
+                return
+            try:
+                prepared = self._prepare_image(image_data)
+            except Exception as process_err:
+                prepared = process_err
+        
+        if isinstance(prepared, Exception):
+            logger.error(f"圖片處理失敗: {type(prepared).__name__}: {str(prepared)}")
+            self.add_error_placeholder(doc, f"圖片處理失敗: {str(prepared)}")
+            return
+        
+        # 添加到文檔（alt 屬性作為圖片說明）
+        try:
+            self._add_picture(doc, prepared, img_element.get('alt', '').strip())
+        except Exception as add_err:
+            logger.error(f"圖片添加失敗: {type(add_err).__name__}: {str(add_err)}")
+            self.add_error_placeholder(doc, f"圖片處理失敗: {str(add_err)}")
 
     def add_error_placeholder(self, doc, error_message):
         """添加錯誤提示段落"""
         try:
-            err_para = doc.add_paragraph()
-            err_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            err_run = err_para.add_run(f"[{error_message}]")
-            err_run.font.color.rgb = RGBColor(255, 0, 0)  # 紅色
-            err_run.font.size = Pt(10)
+            doc.element.body._insert_p(parse_xml(ERROR_PLACEHOLDER_XML % (nsdecls('w'), escape(error_message))))
             logger.info(f"添加錯誤提示: {error_message}")
         except Exception as placeholder_err:
             logger.error(f"無法添加錯誤提示: {placeholder_err}")
@@ -692,16 +1032,8 @@ def process_table(self, doc, table_element):
             table.style = 'Table Grid'
             table.alignment = WD_TABLE_ALIGNMENT.CENTER
             
-            # 設定表格邊框
-            for row in table.rows:
-                for cell in row.cells:
-                    # 將 RGB 顏色值轉為十六進制
-                    hex_color = '%02x%02x%02x' % (
-                        self.colors['gray'][0], 
-                        self.colors['gray'][1], 
-                        self.colors['gray'][2]
-                    )
-                    self.set_cell_border(cell, border_type='single', border_size=2, border_color=hex_color)
+            # 設定表格邊框（表格層級一次設定，套用到所有儲存格）
+            self.set_table_border(table, border_type='single', border_size=2, border_color=self._hex_colors['gray'])
             
             # 填充表格內容
             for i, row in enumerate(rows):
@@ -717,19 +1049,15 @@ def process_table(self, doc, table_element):
                         if is_header:
                             cell_para = table_cell.paragraphs[0]
                             cell_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            run = cell_para.add_run(text)
-                            self.apply_text_formatting(run, {'name_zh': '微軟正黑體', 'name_en': 'Arial', 'size': Pt(11), 'bold': True})
+                            self._append_run(cell_para, text, 'table_header')
                             
                             # 設定背景色
-                            from docx.oxml.ns import nsdecls
-                            from docx.oxml import parse_xml
-                            shading_xml = parse_xml(f'<w:shd {nsdecls("w")} w:fill="F2F2F2"/>')
+                            shading_xml = parse_xml(f'<w:shd {nsdecls("w")} w:fill="{self._hex_colors["light_gray"]}"/>')
                             table_cell._tc.get_or_add_tcPr().append(shading_xml)
                         else:
                             cell_para = table_cell.paragraphs[0]
                             cell_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                            run = cell_para.add_run(text)
-                            self.apply_text_formatting(run, self.fonts['normal'])
+                            self._append_run(cell_para, text, 'normal')
             
             # 設定表格自動適應內容
             table.autofit = True
@@ -737,65 +1065,28 @@ def process_table(self, doc, table_element):
         except Exception as e:
             logger.error(f"處理表格時出錯: {e}")
 
-    def set_cell_border(self, cell, border_locations=None, border_type='single', border_size=2, border_color='000000'):
-        """設置表格單元格的邊框"""
-        if border_locations is None:
-            border_locations = ['top', 'left', 'bottom', 'right']
-        
-        # 獲取 XML 元素的 tcPr (table cell properties)，如果不存在則創建
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-        
-        # 添加 tcBorders 元素，如果不存在
-        tcBorders = OxmlElement('w:tcBorders')
-        tcPr.append(tcBorders)
-        
-        # 定義邊框的 XML 標籤
-        border_types = {
-            'top': 'w:top',
-            'left': 'w:left',
-            'bottom': 'w:bottom',
-            'right': 'w:right'
-        }
-        
-        # 為每個需要的位置設置邊框
-        for border_location in border_locations:
-            if border_location in border_types:
-                tag = border_types[border_location]
-                border_element = OxmlElement(tag)
-                border_element.set(qn('w:val'), border_type)  # 邊框類型
-                border_element.set(qn('w:sz'), str(border_size))  # 邊框大小
-                border_element.set(qn('w:color'), border_color)  # 邊框顏色
-                tcBorders.append(border_element)
-
-    def clear_cell_border(self, cell, border_locations=None):
-        """清除表格單元格的邊框"""
-        if border_locations is None:
-            border_locations = ['top', 'left', 'bottom', 'right']
-        
-        # 獲取 XML 元素的 tcPr (table cell properties)，如果不存在則創建
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-        
-        # 添加 tcBorders 元素，如果不存在
-        tcBorders = OxmlElement('w:tcBorders')
-        tcPr.append(tcBorders)
-        
-        # 定義邊框的 XML 標籤
-        border_types = {
-            'top': 'w:top',
-            'left': 'w:left',
-            'bottom': 'w:bottom',
-            'right': 'w:right'
-        }
+    def set_table_border(self, table, border_type='single', border_size=2, border_color='000000'):
+        """
+        以表格層級的 <w:tblBorders> 一次設定外框與內部格線，
+        取代逐一儲存格寫入 <w:tcBorders>。
+        """
+        # 同樣設定的邊框只 parse 一次，之後複製模板
+        tbl_borders = copy.deepcopy(_tbl_borders_template(border_type, border_size, border_color))
         
-        # 為每個需要的位置設置邊框為 nil
-        for border_location in border_locations:
-            if border_location in border_types:
-                tag = border_types[border_location]
-                border_element = OxmlElement(tag)
-                border_element.set(qn('w:val'), 'nil')  # 設置為 nil 表示無邊框
-                tcBorders.append(border_element)
+        # 依 schema 順序插入 tblPr，若已存在則取代
+        tblPr = table._tbl.tblPr
+        existing = tblPr.find(qn('w:tblBorders'))
+        if existing is not None:
+            tblPr.remove(existing)
+        tblPr.insert_element_before(
+            tbl_borders,
+            'w:shd', 'w:tblLayout', 'w:tblCellMar', 'w:tblLook',
+            'w:tblCaption', 'w:tblDescription', 'w:tblPrChange'
+        )
+
+    def clear_table_border(self, table):
+        """清除表格所有邊框"""
+        self.set_table_border(table, border_type='nil')
 
     def process_blockquote(self, doc, blockquote):
         """處理引用區塊"""
@@ -805,14 +1096,12 @@ def process_blockquote(self, doc, blockquote):
                 return
                 
             p = doc.add_paragraph()
-            p.paragraph_format.left_indent = Cm(1)
-            p.paragraph_format.space_before = Pt(12)
-            p.paragraph_format.space_after = Pt(12)
+            p.paragraph_format.left_indent = BLOCK_INDENT
+            p.paragraph_format.space_before = BLOCK_SPACING
+            p.paragraph_format.space_after = BLOCK_SPACING
             
             run = p.add_run(text)
-            style = self.fonts['normal'].copy()
-            style['italic'] = True
-            self.apply_text_formatting(run, style)
+            self._appliers['normal_italic'](run)
             
         except Exception as e:
             logger.error(f"處理引用區塊時出錯: {e}")
@@ -826,12 +1115,12 @@ def process_code(self, doc, code_block):
                 
             # 添加程式碼區塊
             p = doc.add_paragraph()
-            p.paragraph_format.space_before = Pt(12)
-            p.paragraph_format.space_after = Pt(12)
+            p.paragraph_format.space_before = BLOCK_SPACING
+            p.paragraph_format.space_after = BLOCK_SPACING
             
             # 使用等寬字體
             run = p.add_run(text)
-            self.apply_text_formatting(run, self.fonts['code'])
+            self._appliers['code'](run)
             
             # 添加灰色背景和邊框（這需要直接操作XML）
             # 注意：python-docx不直接支持段落背景色，這裡只是簡單處理
@@ -844,25 +1133,25 @@ def process_code(self, doc, code_block):
     def process_list(self, doc, list_element, is_ordered=False):
         """處理有序或無序列表"""
         list_items = list_element.find_all('li', recursive=False)
+        if not list_items:
+            return
+        
+        # 基本清單樣式：每個清單只依名稱查找一次樣式物件
+        list_style = doc.styles['List Number' if is_ordered else 'List Bullet']
 
         for idx, li in enumerate(list_items, start=1):
             p = doc.add_paragraph()
-            # 基本清單樣式
-            if is_ordered:
-                p.style = 'List Number'
-            else:
-                p.style = 'List Bullet'
-            p.paragraph_format.left_indent = Cm(0.5)
-            p.paragraph_format.first_line_indent = Cm(-0.5)
+            p.style = list_style
+            p.paragraph_format.left_indent = LIST_INDENT
+            p.paragraph_format.first_line_indent = LIST_HANGING_INDENT
             p.paragraph_format.line_spacing = 1.5
-            p.paragraph_format.space_before = Pt(6)
-            p.paragraph_format.space_after = Pt(6)
+            p.paragraph_format.space_before = LIST_SPACING
+            p.paragraph_format.space_after = LIST_SPACING
 
             # 有序清單手動加編號
             if is_ordered:
                 prefix = f"{idx}. "
-                num_run = p.add_run(prefix)
-                self.apply_text_formatting(num_run, self.fonts['normal'])
+                self._append_run(p, prefix, 'normal')
 
             # 處理列表項內容
             for child in li.contents:
@@ -878,126 +1167,88 @@ def process_list(self, doc, list_element, is_ordered=False):
             if nested_ol:
                 self.process_list(doc, nested_ol, True)
 
-    def add_hyperlink(self, paragraph, run, url):
-        """添加超連結到Word文檔中"""
-        try:
-            # 這個功能需要直接操作Word的XML
-            # Define relationships in XML
-            part = paragraph.part
-            r_id = part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
-            
-            # Get the run's XML element
-            r = run._r
-            # Create hyperlink element
-            hyperlink = OxmlElement('w:hyperlink')
-            hyperlink.set(qn('r:id'), r_id)
-            
-            # The existing run for the text content
-            hyperlink.append(r)
-            
-            # Add hyperlink to paragraph
-            r_position = paragraph._p.index(r)
-            paragraph._p[r_position] = hyperlink
-            
-        except Exception as e:
-            logger.error(f"添加超連結時出錯: {e}")
-            # 如果無法建立超連結，至少保留文字
-            return
-
     def process_text_with_formatting(self, paragraph, element):
         """處理文字格式，包括粗體、斜體等，並保留超連結"""
         try:
-            # 如果元素是純文字節點
-            if isinstance(element, str):
-                # 判斷是否為英文
-                is_english = all(ord(c) < 128 for c in element.strip())
-                run = paragraph.add_run(element)
-                self.apply_text_formatting(run, self.fonts['normal'], is_english)
-                return
-                
-            # 處理子元素
-            for child in element.children:
-                # 如果子元素是字符串（文字節點）
-                if isinstance(child, str):
-                    # 判斷是否為英文
-                    is_english = all(ord(c) < 128 for c in child.strip())
-                    run = paragraph.add_run(child)
-                    self.apply_text_formatting(run, self.fonts['normal'], is_english)
-                
-                # 如果是加粗標籤
-                elif child.name == 'strong' or child.name == 'b':
-                    text = child.get_text()
-                    is_english = all(ord(c) < 128 for c in text.strip())
-                    run = paragraph.add_run(text)
-                    style = self.fonts['normal'].copy()
-                    style['bold'] = True
-                    self.apply_text_formatting(run, style, is_english)
-                
-                # 如果是斜體標籤
-                elif child.name == 'em' or child.name == 'i':
-                    text = child.get_text()
-                    is_english = all(ord(c) < 128 for c in text.strip())
-                    run = paragraph.add_run(text)
-                    style = self.fonts['normal'].copy()
-                    style['italic'] = True
-                    self.apply_text_formatting(run, style, is_english)
-                
-                # 如果是下劃線標籤
-                elif child.name == 'u':
-                    text = child.get_text()
-                    is_english = all(ord(c) < 128 for c in text.strip())
-                    run = paragraph.add_run(text)
-                    style = self.fonts['normal'].copy()
-                    style['underline'] = True
-                    self.apply_text_formatting(run, style, is_english)
-                
-                # 如果是超連結
-                elif child.name == 'a':
-                    text = child.get_text()
-                    href = child.get('href', '')
-                    is_english = all(ord(c) < 128 for c in text.strip())
-                    
-                    # 添加超連結文字並設置格式
-                    run = paragraph.add_run(text)
-                    style = self.fonts['normal'].copy()
-                    style['underline'] = True
-                    self.apply_text_formatting(run, style, is_english)
-                    
-                    # 使用python-docx添加真正的超連結
-                    if href:
-                        self.add_hyperlink(paragraph, run, href)
-                
-                # 如果是其他帶格式的元素，遞歸處理
-                elif hasattr(child, 'children'):
-                    self.process_text_with_formatting(paragraph, child)
+            spans = []
+            self._collect_spans(element, spans)
+            if spans:
+                # 所有 run 包在同一個 <w:p> 中一次 parse，再整批移到目標段落
+                wrapper = parse_xml(PARAGRAPH_PREFIX + self._spans_xml(paragraph.part, spans) + PARAGRAPH_SUFFIX)
+                paragraph._p.extend(list(wrapper))
                     
         except Exception as e:
             logger.error(f"處理文字格式時出錯: {e}")
             run = paragraph.add_run(f"[格式處理錯誤: {str(e)}]")
-            run.font.color.rgb = RGBColor(255, 0, 0)
+            run.font.color.rgb = ERROR_COLOR
+
+    @staticmethod
+    def _add_span(spans, style_key, text, href=None):
+        """
+        加入一段文字；與前一段樣式相同（且皆非超連結）時直接合併文字，減少 run 數量。
+        純空白的文字不影響字型，只要樣式相同就併入前一段。
+        """
+        stripped = text.strip()
+        is_english = stripped.isascii()
+        if spans and href is None:
+            prev_style, prev_text, prev_english, prev_href = spans[-1]
+            if prev_href is None and prev_style == style_key and (prev_english == is_english or not stripped):
+                spans[-1] = (prev_style, prev_text + text, prev_english, None)
+                return
+        spans.append((style_key, text, is_english, href))
+
+    def _collect_spans(self, element, spans):
+        """
+        將元素的文字依格式拆成 (樣式, 文字, 是否英文, 超連結) 並依序加入 spans，
+        粗體、斜體、底線與超連結對應不同樣式，其他帶格式的元素遞迴處理。
+        """
+        # 如果元素是純文字節點
+        if isinstance(element, str):
+            self._add_span(spans, 'normal', element)
+            return
+            
+        # 處理子元素
+        for child in element.children:
+            # 如果子元素是字符串（文字節點）
+            if isinstance(child, str):
+                self._add_span(spans, 'normal', child)
+            
+            # 如果是粗體、斜體或下劃線標籤，直接使用預先建立的衍生樣式
+            elif child.name in INLINE_STYLE_KEYS:
+                self._add_span(spans, INLINE_STYLE_KEYS[child.name], _element_text(child))
+            
+            # 如果是超連結：文字加底線，有 href 時包成真正的超連結
+            elif child.name == 'a':
+                self._add_span(spans, 'normal_underline', _element_text(child), child.get('href', '') or None)
+            
+            # 如果是其他帶格式的元素，遞歸處理
+            elif hasattr(child, 'children'):
+                self._collect_spans(child, spans)
 
     def process_plotly_chart(self, doc, plotly_div):
         """處理Plotly圖表元素"""
         try:
-            # 查找相關的script標籤
-            script_tag = plotly_div.find_next_sibling('script')
-            if not script_tag:
-                # 嘗試查找父元素下的script
-                parent = plotly_div.parent
-                if parent:
-                    script_tag = parent.find('script', string=lambda text: text and 'Plotly.newPlot' in text)
-            
-            if not script_tag:
+            # 以 div id 從整頁預先建立的對照表查找腳本
+            div_id = plotly_div.get('id')
+            plotly_scripts = self._get_plotly_scripts()
+            script_content = plotly_scripts.get(div_id) if div_id else None
+            
+            if script_content is None:
+                # 沒有 id 或對照不到時，沿用相鄰的 script，否則取頁面中第一個 Plotly 腳本
+                script_tag = plotly_div.find_next_sibling('script')
+                if script_tag:
+                    script_content = script_tag.string or script_tag.get_text()
+                elif plotly_scripts:
+                    script_content = next(iter(plotly_scripts.values()))
+            
+            if not script_content:
                 logger.warning("找不到相關的Plotly腳本")
                 self.add_error_placeholder(doc, "找不到圖表數據")
                 return
             
-            # 提取Plotly數據
-            script_content = script_tag.string or script_tag.get_text()
             
             # 使用正則表達式提取Plotly.newPlot的參數
-            import json
-            plot_match = re.search(r'Plotly\.newPlot\s*\(\s*["\']([^"\']+)["\'],\s*(\[.*?\]),\s*(\{.*?\})', script_content, re.DOTALL)
+            plot_match = PLOTLY_NEWPLOT_RE.search(script_content)
             
             if not plot_match:
                 logger.warning("無法解析Plotly數據")
@@ -1022,53 +1273,54 @@ def process_plotly_chart(self, doc, plotly_div):
             logger.error(f"處理Plotly圖表時出錯: {e}")
             self.add_error_placeholder(doc, f"圖表處理失敗: {str(e)}")
 
+    def _get_plotly_scripts(self):
+        """
+        建立目前頁面 {div_id: Plotly 腳本內容} 對照表（每頁第一次需要時才建立），
+        從原始 HTML 只解析 script 標籤，一次掃描所有 Plotly.newPlot 呼叫。
+        """
+        if self._plotly_scripts is None:
+            scripts = {}
+            if self._html_source and 'Plotly.newPlot' in self._html_source:
+                soup = BeautifulSoup(self._html_source, HTML_PARSER, parse_only=SCRIPT_STRAINER)
+                for tag in soup.find_all('script'):
+                    text = tag.string or tag.get_text()
+                    for div_id in PLOTLY_DIV_ID_RE.findall(text):
+                        scripts.setdefault(div_id, text)
+            self._plotly_scripts = scripts
+        return self._plotly_scripts
+
     def create_plotly_image(self, doc, plot_data, plot_layout):
         """使用Plotly創建靜態圖片並插入Docx"""
         try:
             import plotly.graph_objects as go
             import plotly.io as pio
-            from PIL import Image
-            import io
             
             # 創建Plotly圖表
             fig = go.Figure(data=plot_data, layout=plot_layout)
             
             # 設置圖片尺寸和格式
+            layout_width = 800
             fig.update_layout(
-                width=800,
+                width=layout_width,
                 height=600,
                 font=dict(size=12),
                 margin=dict(l=50, r=50, t=50, b=50)
             )
             
-            # 將圖表轉換為PNG圖片
-            img_bytes = pio.to_image(fig, format="png", engine="kaleido")
-            
-            # 使用PIL處理圖片
-            img_stream = io.BytesIO(img_bytes)
+            # 直接以 Word 最大寬度的像素輸出 PNG（kaleido 依 scale 縮放），不需再以 PIL 解碼縮放
+            max_width_px = MAX_IMAGE_WIDTH_PX
+            scale = min(1.0, max_width_px / layout_width)
+            img_bytes = pio.to_image(fig, format="png", engine="kaleido", scale=scale)
             
-            with Image.open(img_stream) as pil_img:
-                # 計算適合的尺寸
-                width, height = pil_img.size
-                max_width_cm = 15  # 最大寬度 15cm
-                max_width_px = max_width_cm * 37.795  # 1cm ≈ 37.795 pixels at 96 DPI
-                
-                if width > max_width_px:
-                    scale = max_width_px / width
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # 保存調整後的圖片
-                    processed_stream = io.BytesIO()
-                    pil_img.save(processed_stream, format='PNG', quality=85, optimize=True)
-                    processed_stream.seek(0)
-                else:
-                    img_stream.seek(0)
-                    processed_stream = img_stream
+            # 只讀 PNG 的 IHDR 取得寬度，仍超過上限時才交給 PIL 縮放
+            dimensions = _png_dimensions(img_bytes)
+            if dimensions is None or dimensions[0] > max_width_px + 1:
+                processed_stream, _ = self._prepare_image(img_bytes)
+            else:
+                processed_stream = io.BytesIO(img_bytes)
             
             # 計算Word中的顯示尺寸
-            display_width = Cm(min(15, width * 2.54 / 96))
+            display_width = Cm(min(15, layout_width * 2.54 / 96))
             
             # 添加圖片到文檔
             img_paragraph = doc.add_paragraph()
@@ -1090,7 +1342,7 @@ def create_plotly_image(self, doc, plot_data, plot_layout):
                 caption = doc.add_paragraph()
                 caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
                 caption_run = caption.add_run(f"圖: {title_text}")
-                self.apply_text_formatting(caption_run, self.fonts['caption'])
+                self._appliers['caption'](caption_run)
             
         except ImportError:
             logger.error("缺少必要的庫: plotly 和 kaleido")
@@ -1105,33 +1357,38 @@ def process_html_content(self, doc, html_content):
             # 獲取前端傳來的位置信息
             charts_position_info = getattr(self, 'charts_position_info', {})
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 只解析需要處理的標籤，省去 script/style 等節點的建立
+            self._html_source = html_content
+            self._plotly_scripts = None
+            soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=CONTENT_STRAINER)
+
+            # 先並行下載所有 URL 圖片，避免逐張序列下載
+            self._prefetch_images(soup)
             
             # 處理各種HTML元素
-            for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol', 'img', 'table', 'blockquote', 'pre', 'code', 'div']):
+            # 直接走訪 descendants 以 frozenset 比對標籤名稱，省去 find_all 逐一套用過濾規則的成本；
+            # 以產生器逐一取得，不先建立整份文件的元素清單（處理過程不修改解析樹）
+            for element in (el for el in soup.descendants if el.name in CONTENT_TAGS):
                 if element.name == 'h1':
                     text = element.get_text().strip()
-                    clean_text = re.sub(r'^\d+\.\s*\d+\.\s*', '', text)
+                    clean_text = HEADING_NUMBER_RE.sub('', text)
                     
                     h1 = doc.add_heading('', level=1)
-                    run = h1.add_run(clean_text)
-                    self.apply_text_formatting(run, self.fonts['h1'])
+                    self._append_run(h1, clean_text, 'h1')
                 
                 elif element.name == 'h2':
                     text = element.get_text().strip()
-                    clean_text = re.sub(r'^\d+\.\s*\d+\.\s*', '', text)
+                    clean_text = HEADING_NUMBER_RE.sub('', text)
                     
                     h2 = doc.add_heading('', level=2)
-                    run = h2.add_run(clean_text)
-                    self.apply_text_formatting(run, self.fonts['h2'])
+                    self._append_run(h2, clean_text, 'h2')
                 
                 elif element.name == 'h3':
                     text = element.get_text().strip()
-                    clean_text = re.sub(r'^\d+\.\s*\d+\.\s*', '', text)
+                    clean_text = HEADING_NUMBER_RE.sub('', text)
                     
                     h3 = doc.add_heading('', level=3)
-                    run = h3.add_run(clean_text)
-                    self.apply_text_formatting(run, self.fonts['h3'])
+                    self._append_run(h3, clean_text, 'h3')
                 
                 elif element.name == 'p':
                     # 跳過圖表錯誤信息和佔位符
@@ -1139,9 +1396,16 @@ def process_html_content(self, doc, html_content):
                     if any(x in text_content for x in ['[圖表數據缺失:', '[找不到圖表:', '[圖表處理失敗:', '[WORD_CHART_']):
                         continue
                     
-                    p = doc.add_paragraph()
-                    self.apply_paragraph_settings(p)
-                    self.process_text_with_formatting(p, element)
+                    # 整段組成單一 XML 一次插入
+                    try:
+                        spans = []
+                        self._collect_spans(element, spans)
+                        self._emit_paragraph(doc, spans)
+                    except Exception as e:
+                        logger.error(f"處理文字格式時出錯: {e}")
+                        p = doc.add_paragraph()
+                        self.apply_paragraph_settings(p)
+                        self.process_text_with_formatting(p, element)
                 
                 elif element.name in ('ul', 'ol'):
                     self.process_list(doc, element, element.name == 'ol')
@@ -1184,18 +1448,69 @@ def process_html_content(self, doc, html_content):
             logger.error(f"處理HTML內容時出錯: {e}")
             doc.add_paragraph(f"處理內容時發生錯誤: {str(e)}")
 
+    def _get_chart_index(self, position_info):
+        """
+        建立 {chart_id: chart_info} 索引（同一 position_info 只建立一次），
+        chart_id 重複時保留第一個，與原本依序搜尋的結果一致。
+        """
+        if self._chart_index_source is not position_info:
+            chart_index = {}
+            for page_info in position_info.values():
+                for chart_info in page_info:
+                    chart_index.setdefault(chart_info.get("chart_id"), chart_info)
+            self._chart_index = chart_index
+            self._chart_index_source = position_info
+        return self._chart_index
+
+    def _decode_chart(self, img_static_b64):
+        """
+        在背景執行緒中解碼並預處理圖表圖片，回傳 (img_static, prepared)；
+        預處理失敗時 prepared 為該例外，由 process_vanna_static_image 產生錯誤提示。
+        """
+        img_static = base64.b64decode(img_static_b64)
+        try:
+            prepared = self._prepare_image(img_static) if img_static else None
+        except Exception as prepare_err:
+            prepared = prepare_err
+        return img_static, prepared
+
+    def _prefetch_charts(self):
+        """
+        找出所有章節引用的圖表佔位符，將圖表的 base64 解碼與縮放送到執行緒池並行處理，
+        主執行緒處理到佔位符時只需取回結果插入文檔。
+        """
+        self._chart_futures = {}
+        chart_index = self._get_chart_index(self.charts_position_info)
+        if not chart_index:
+            return
+        
+        chart_ids = set()
+        for items in self.content.values():
+            for html_content in items.values():
+                if html_content and '[WORD_CHART_' in html_content:
+                    chart_ids.update(WORD_CHART_PLACEHOLDER_RE.findall(html_content))
+        
+        targets = {}
+        for chart_id in chart_ids:
+            chart_info = chart_index.get(chart_id)
+            img_static_b64 = chart_info.get("img_static_b64") if chart_info else None
+            if img_static_b64:
+                targets[chart_id] = img_static_b64
+        if not targets:
+            return
+        
+        logger.info(f"並行預處理 {len(targets)} 個圖表")
+        # 執行緒池留到 export 結束時才關閉，insert_chart_with_position_info 透過 future 取回結果
+        self._chart_executor = ThreadPoolExecutor(max_workers=min(CHART_PREPARE_WORKERS, len(targets)))
+        for chart_id, img_static_b64 in targets.items():
+            self._chart_futures[chart_id] = self._chart_executor.submit(self._decode_chart, img_static_b64)
+
     def insert_chart_with_position_info(self, doc, chart_id, position_info):
         """使用位置信息正確插入圖表 - 簡化版本"""
         try:
-            # 從位置信息中找到對應的圖表
-            target_chart = None
-            for page_info in position_info.values():
-                for chart_info in page_info:
-                    if chart_info.get("chart_id") == chart_id:
-                        target_chart = chart_info
-                        break
-                if target_chart:
-                    break
+            # 從位置信息的索引中找到對應的圖表
+            chart_index = self._get_chart_index(position_info)
+            target_chart = chart_index.get(chart_id)
             
             if target_chart:
                 title_text = target_chart.get("title_text", "")
@@ -1205,9 +1520,13 @@ def insert_chart_with_position_info(self, doc, chart_id, position_info):
                 
                 if img_static_b64:
                     try:
-                        # 統一的解碼邏輯
-                        img_static = base64.b64decode(img_static_b64)
-                        self.process_vanna_static_image(doc, img_static, title_text)
+                        # 優先使用背景執行緒預先解碼與處理的結果
+                        future = self._chart_futures.get(chart_id)
+                        if future is not None:
+                            img_static, prepared = future.result()
+                        else:
+                            img_static, prepared = base64.b64decode(img_static_b64), None
+                        self.process_vanna_static_image(doc, img_static, title_text, prepared)
                         
                         logger.info(f"✅ 成功插入圖表: {title_text} ({len(img_static)} bytes)")
                         logger.info(f"📍 位置: {target_chart.get('target_section', '未知章節')}")
@@ -1220,8 +1539,7 @@ def insert_chart_with_position_info(self, doc, chart_id, position_info):
                     self.add_error_placeholder(doc, f"圖表數據缺失: {chart_id}")
             else:
                 logger.warning(f"❌ 找不到圖表 {chart_id} 的位置信息")
-                available_ids = [chart.get('chart_id') for page_charts in position_info.values() for chart in page_charts]
-                logger.warning(f"可用圖表ID: {available_ids}")
+                logger.warning(f"可用圖表ID: {list(chart_index)}")
                 self.add_error_placeholder(doc, f"找不到圖表: {chart_id}")
             
         except Exception as e:
@@ -1233,6 +1551,9 @@ def export(self, file_path: str):
         logger.info(f"開始匯出Word文件: {file_path}")
         
         try:
+            # 先把各章節引用的圖表送到背景執行緒解碼與縮放，與封面、目錄的建立同時進行
+            self._prefetch_charts()
+            
             # 創建新文檔
             doc = Document()
             
@@ -1262,11 +1583,8 @@ def export(self, file_path: str):
                         
                         img_size = 0
                         if has_img_static_b64:
-                            try:
-                                img_data = base64.b64decode(chart["img_static_b64"])
-                                img_size = len(img_data)
-                            except:
-                                img_size = 0
+                            # 只為了記錄大小，直接由 base64 長度推算，不實際解碼
+                            img_size = _b64_decoded_size(chart["img_static_b64"])
                         elif has_img_static:
                             img_field = chart["img_static"]
                             if isinstance(img_field, dict) and "bytes" in img_field:
@@ -1293,8 +1611,7 @@ def export(self, file_path: str):
                         
                         # 檢查並記錄圖表佔位符
                         if '[WORD_CHART_' in html_content:
-                            import re
-                            placeholders = re.findall(r'\[WORD_CHART_([^\]]+)\]', html_content)
+                            placeholders = WORD_CHART_PLACEHOLDER_RE.findall(html_content)
                             logger.info(f"在 {subtitle} 中發現 {len(placeholders)} 個圖表佔位符: {placeholders}")
                         
                         # 使用新的處理邏輯
@@ -1305,7 +1622,8 @@ def export(self, file_path: str):
                     doc.add_page_break()
             
             # 儲存文件
-            doc.save(file_path)
+            with self.open_output(file_path) as output:
+                doc.save(output)
             
             # 記錄完成信息
             total_charts = sum(len(charts) for charts in self.charts_data.values()) if self.charts_data else 0
@@ -1335,9 +1653,17 @@ def export(self, file_path: str):
                 error_doc.add_paragraph(f"- 總圖表數量: {total_charts}")
                 
                 error_doc.add_paragraph("\n請將此報告發送給系統管理員。")
-                error_doc.save(file_path)
+                with self.open_output(file_path) as output:
+                    error_doc.save(output)
                 
                 logger.info(f"錯誤報告已保存至: {file_path}")
                 
             except Exception as report_error:
-                logger.error(f"無法創建錯誤報告: {report_error}")
\ No newline at end of file
+                logger.error(f"無法創建錯誤報告: {report_error}")
+        
+        finally:
+            # 不論成功或失敗都關閉圖表執行緒池：取消未開始的工作並等待執行中的完成，
+            # 避免背景執行緒在 Lambda 凍結後延續到下一次呼叫
+            if self._chart_executor is not None:
+                self._chart_executor.shutdown(wait=True, cancel_futures=True)
+                self._chart_executor = None
\ No newline at end of file
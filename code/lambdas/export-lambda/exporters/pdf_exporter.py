@@ -29,25 +29,26 @@ def export(self, file_path: str):
             PageBreak()
         ]
 
+        section_style = styles["Section"]
+        subtitle_style = styles["Subtitle"]
+        body_style = styles["Body"]
+
         for section, items in self.content.items():
-            story.append(Paragraph(section, styles["Section"]))
+            story.append(Paragraph(section, section_style))
             for subtitle, body in items.items():
                 for sub_title, content in split_by_h2(body):
-                    story.append(Paragraph(sub_title.strip(), styles["Subtitle"]))
-                    for para in extract_text_blocks(content):
-                        # 處理條列符號
-                        if para.startswith("• "):
-                            story.append(Paragraph(para, styles["Body"]))
-                        else:
-                            story.append(Paragraph(para, styles["Body"]))
-
-        SimpleDocTemplate(
-            file_path,
-            pagesize=letter,
-            rightMargin=40,
-            leftMargin=40,
-            topMargin=40,
-            bottomMargin=40,
-        ).build(story)
+                    story.append(Paragraph(sub_title.strip(), subtitle_style))
+                    # 條列項目與一般段落使用相同樣式，直接保留 "• " 符號
+                    story.extend(Paragraph(para, body_style) for para in extract_text_blocks(content))
+
+        with self.open_output(file_path) as output:
+            SimpleDocTemplate(
+                output,
+                pagesize=letter,
+                rightMargin=40,
+                leftMargin=40,
+                topMargin=40,
+                bottomMargin=40,
+            ).build(story)
 
         logger.info("PDF export completed")
\ No newline at end of file
@@ -7,6 +7,9 @@
 
 logger = get_logger("pdf_exporter")
 
+# extract_text_blocks 為條列項目加上的前綴
+BULLET = "• "
+
 class PptExporter(Exporter):
     """
     專門處理 PPT (.pptx) 檔案匯出的類別。
@@ -38,11 +41,12 @@ def export(self, file_path: str):
 
                     for para in extract_text_blocks(content):
                         p = tf.add_paragraph()
-                        if para.startswith("• "):
-                            p.text = para[2:].strip()
+                        if para.startswith(BULLET):
+                            p.text = para.removeprefix(BULLET).strip()
                             p.level = 1  # 條列縮排
                         else:
                             p.text = para.strip()
 
-        prs.save(file_path)
+        with self.open_output(file_path) as output:
+            prs.save(output)
         logger.info("PPT export completed")
\ No newline at end of file
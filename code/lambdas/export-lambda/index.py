@@ -1,8 +1,9 @@
+import io
 import json
-import os
-import base64
+import logging
 import tempfile
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from connections import Connections
 from exporters.pdf_exporter import PdfExporter
@@ -13,56 +14,96 @@
 
 logger = get_logger("index")
 
+# base64 編碼：優先使用 pybase64（SIMD 實作，API 與標準庫相同），未安裝時退回標準庫
+try:
+    import pybase64 as b64codec
+except ImportError:
+    import base64 as b64codec
+
+# JSON 編解碼：優先使用 orjson（C 實作，預設輸出 UTF-8 不跳脫），未安裝時退回標準庫
+try:
+    import orjson
+
+    loads_json = orjson.loads
+
+    def dumps_json(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    loads_json = json.loads
+
+    def dumps_json(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+# 下載用預簽章 URL 的有效秒數
+PRESIGNED_URL_EXPIRES = 3600
+
+# 匯出檔在記憶體中暫存的上限，超過才寫入 /tmp
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
 EXPORTER_MAP = {
     "docx": DocxExporter,
     "pdf": PdfExporter,
     "ppt": PptExporter,
 }
 
+# 上傳 S3 時設定的 Content-Type（ppt 實際輸出為 pptx 格式）
+CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+    "ppt": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+def encode_base64(data: bytes) -> str:
+    """
+    一次編碼整份內容：輸出大小固定為 ((n + 2) // 3) * 4，由編碼器一次配置，不會反覆擴充緩衝區。
+    pybase64 可直接產生 str，省去 bytes -> str 的再一次複製。
+    """
+    if hasattr(b64codec, "b64encode_as_string"):
+        return b64codec.b64encode_as_string(data)
+    return b64codec.b64encode(data).decode("ascii")
+
+
 @exception_handler
 def lambda_handler(event, context):
-    logger.info(f"Received event: {event}")
+    logger.info("Received event: %s", event)
     
     try:
-        body = json.loads(event["body"])
+        body = loads_json(event["body"])
         company_info = body["company_info"]
         raw_analysis = body["analysis"]
-        file_format = body["format"].lower()
+        file_format = body["format"].strip().lower()
         session_id = body["session_id"]
+        inline = bool(body.get("inline", False))
+
+        # 先檢查檔案格式是否支援，不支援時在處理圖表數據前就直接回應
+        exporter_cls = EXPORTER_MAP.get(file_format)
+        if exporter_cls is None:
+            logger.error("不支援的檔案格式: %s", file_format)
+            raise ExportFormatError(f"不支援的匯出格式: {file_format}")
 
         # 處理圖表數據
         charts_data = body.get("charts_data", {})
-        logger.info(f"接收到圖表數據頁面: {list(charts_data.keys())}")
+        logger.info("接收到圖表數據頁面: %s", list(charts_data))
 
         # 處理圖表位置信息
         charts_position_info = body.get("charts_position_info", {})
-        logger.info(f"接收到圖表位置信息頁面: {list(charts_position_info.keys())}")
+        logger.info("接收到圖表位置信息頁面: %s", list(charts_position_info))
         
-        # 將 base64 轉換為 bytes
-        # 這樣避免了 invoke-lambda 返回不可序列化的 bytes 數據
-        processed_charts_data = {}
+        # 圖表直接沿用請求中的原始資料（base64 交由匯出器解碼），這裡只統計每頁有效圖表數
+        processed_charts_data = charts_data
         for page_name, charts_list in charts_data.items():
-            processed_charts_data[page_name] = []
-            
-            for chart in charts_list:
-                # 直接保持原有格式，不做額外處理
-                processed_chart = chart.copy()
-                
-                # 只做驗證，不轉換
-                img_static_b64 = chart.get("img_static_b64")
-                if img_static_b64:
-                    logger.info(f"✅ 圖表 {chart.get('title_text')} 包含有效的 base64 數據")
-                else:
-                    logger.warning(f"⚠️ 圖表 {chart.get('title_text')} 缺少 img_static_b64 數據")
-                
-                processed_charts_data[page_name].append(processed_chart)
+            valid = sum(1 for chart in charts_list if chart.get("img_static_b64"))
+            if valid == len(charts_list):
+                logger.info("📊 頁面 %s: %d/%d 個圖表包含 base64 數據", page_name, valid, len(charts_list))
+                continue
+            logger.warning("⚠️ 頁面 %s: %d/%d 個圖表包含 base64 數據", page_name, valid, len(charts_list))
+            if logger.isEnabledFor(logging.DEBUG):
+                for chart in charts_list:
+                    if not chart.get("img_static_b64"):
+                        logger.debug("⚠️ 圖表 %s 缺少 img_static_b64 數據", chart.get("title_text"))
         
-        logger.info(f"📊 圖表數據處理完成，總計 {sum(len(charts) for charts in processed_charts_data.values())} 個圖表")
-
-        # 檢查檔案格式是否支援
-        if file_format not in EXPORTER_MAP:
-            logger.error(f"不支援的檔案格式: {file_format}")
-            raise ExportFormatError(f"不支援的匯出格式: {file_format}")
+        total_charts = sum(len(charts) for charts in processed_charts_data.values())
+        logger.info("📊 圖表數據處理完成，總計 %d 個圖表", total_charts)
 
         # 整理分析資料結構
         analysis = {
@@ -71,18 +112,12 @@ def lambda_handler(event, context):
         }
 
         # 生成檔案名稱前綴
-        prefix = (
-            f"{company_info.get('品牌名稱', '報告')}_"
-            f"{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        )
+        prefix = f"{company_info.get('品牌名稱', '報告')}_{time.strftime('%Y%m%d_%H%M%S')}"
 
-        # 使用臨時目錄處理檔案
-        with tempfile.TemporaryDirectory() as tmpdir:
-            file_path = os.path.join(tmpdir, f"{prefix}.{file_format}")
+        filename = f"{prefix}.{file_format}"
 
-            # 選擇對應的匯出器
-            exporter_cls = EXPORTER_MAP[file_format]
-            
+        # 匯出檔直接寫入暫存串流：小檔案只留在記憶體，超過 SPOOL_MAX_SIZE 才寫入 /tmp
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as output:
             # 根據檔案格式決定是否傳入圖表數據
             if file_format == "docx":
                 # 只有 Word 格式需要圖表數據
@@ -92,79 +127,105 @@ def lambda_handler(event, context):
                     processed_charts_data,
                     charts_position_info
                 )
-                logger.info(f"建立 DOCX 匯出器，包含 {sum(len(v) for v in processed_charts_data.values())} 個圖表")
-                logger.info(f"圖表位置信息: {sum(len(v) for v in charts_position_info.values())} 個位置記錄")
+                logger.info("建立 DOCX 匯出器，包含 %d 個圖表", total_charts)
+                logger.info("圖表位置信息: %d 個位置記錄", sum(len(v) for v in charts_position_info.values()))
             else:
                 # PDF 和 PPT 暫不支援圖表插入
                 exporter = exporter_cls(analysis, company_info)
-                logger.info(f"建立 {file_format.upper()} 匯出器（不包含圖表）")
+                logger.info("建立 %s 匯出器（不包含圖表）", file_format.upper())
                 
             # 執行檔案匯出
-            logger.info(f"開始匯出檔案: {file_path}")
-            exporter.export(file_path)
+            logger.info("開始匯出檔案: %s", filename)
+            exporter.export(output)
             
             # 檢查檔案是否成功生成
-            if not os.path.exists(file_path):
-                raise Exception(f"檔案生成失敗: {file_path}")
+            file_size = output.seek(0, io.SEEK_END)
+            if not file_size:
+                raise Exception(f"檔案生成失敗: {filename}")
             
-            file_size = os.path.getsize(file_path)
-            logger.info(f"檔案生成成功: {file_path}, 大小: {file_size} bytes")
+            logger.info("檔案生成成功: %s, 大小: %d bytes", filename, file_size)
 
             # 上傳至 S3
-            s3_key = f"exports/{session_id}/{prefix}.{file_format}"
-            logger.info(f"上傳檔案至 S3: {s3_key}")
+            s3_key = f"exports/{session_id}/{filename}"
+            logger.info("上傳檔案至 S3: %s", s3_key)
             
-            Connections.s3_client().upload_file(
-                file_path, Connections.s3_bucket_name, s3_key
+            upload_args = (Connections.s3_bucket_name, s3_key)
+            upload_kwargs = {
+                "ExtraArgs": {"ContentType": CONTENT_TYPES[file_format]},
+                "Config": Connections.transfer_config,
+            }
+
+            output.seek(0)
+            encoded = None
+            if inline:
+                # 只在此讀出一份 bytes：BytesIO(data) 直接共用 data 的緩衝區，編碼器也直接讀取 data，
+                # 上傳與編碼之間不會再複製檔案內容
+                data = output.read()
+                # 上傳（網路）與 base64 編碼（CPU）互不相依，同時進行
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    upload_future = executor.submit(Connections.s3_client().upload_fileobj, io.BytesIO(data), *upload_args, **upload_kwargs)
+                    encode_future = executor.submit(encode_base64, data)
+                    upload_future.result()
+                    encoded = encode_future.result()
+            else:
+                # 直接由暫存串流分段讀取上傳，不先讀成完整的 bytes
+                Connections.s3_client().upload_fileobj(output, *upload_args, **upload_kwargs)
+
+            # 呼叫端直接以預簽章 URL 從 S3 下載，不再經由回應傳送檔案內容
+            download_url = Connections.s3_client().generate_presigned_url(
+                "get_object",
+                Params={"Bucket": Connections.s3_bucket_name, "Key": s3_key},
+                ExpiresIn=PRESIGNED_URL_EXPIRES,
             )
+            logger.info("檔案匯出完成並上傳至 S3: %s", s3_key)
+
+            body_json = dumps_json({
+                "message": "匯出成功",
+                "download_path": f"s3://{Connections.s3_bucket_name}/{s3_key}",
+                "download_url": download_url,
+                "filename": filename,
+                "file_size": file_size,
+                "charts_count": total_charts if file_format == "docx" else 0
+            })
 
-            # 讀取檔案並轉換為 base64
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-                encoded = base64.b64encode(file_content).decode("utf-8")
+            if not inline:
+                return {"statusCode": 200, "body": body_json}
 
-            logger.info(f"檔案匯出完成並上傳至 S3: {s3_key}")
-            logger.info(f"檔案大小: {len(file_content)} bytes, Base64 大小: {len(encoded)} 字符")
+            # 相容舊呼叫端：inline=True 時仍在回應中附上 base64 檔案內容
+            logger.info("檔案大小: %d bytes, Base64 大小: %d 字符", file_size, len(encoded))
 
-            # 返回成功響應
+            # base64 字串只含 ASCII、不需跳脫，直接接在 JSON 尾端，避免序列化時再掃描並複製一次
             return {
                 "statusCode": 200,
-                "body": json.dumps({
-                    "message": "匯出成功",
-                    "download_path": f"s3://{Connections.s3_bucket_name}/{s3_key}",
-                    "filename": f"{prefix}.{file_format}",
-                    "filedata": encoded,
-                    "file_size": len(file_content),
-                    "charts_count": sum(len(v) for v in processed_charts_data.values()) if file_format == "docx" else 0
-                }, ensure_ascii=False),
+                "body": f'{body_json[:-1]}, "filedata": "{encoded}"}}',
             }
             
-    except json.JSONDecodeError as json_err:
-        logger.error(f"JSON 解析錯誤: {json_err}")
+    except json.JSONDecodeError as json_err:  # orjson.JSONDecodeError 為其子類別
+        logger.error("JSON 解析錯誤: %s", json_err)
         return {
             "statusCode": 400,
-            "body": json.dumps({
+            "body": dumps_json({
                 "error": "請求格式錯誤",
                 "message": f"JSON 解析失敗: {str(json_err)}"
-            }, ensure_ascii=False)
+            })
         }
         
     except ExportFormatError as format_err:
-        logger.error(f"格式錯誤: {format_err}")
+        logger.error("格式錯誤: %s", format_err)
         return {
             "statusCode": 400,
-            "body": json.dumps({
+            "body": dumps_json({
                 "error": "不支援的檔案格式",
                 "message": str(format_err)
-            }, ensure_ascii=False)
+            })
         }
         
     except Exception as general_err:
-        logger.error(f"匯出過程發生錯誤: {general_err}", exc_info=True)
+        logger.error("匯出過程發生錯誤: %s", general_err, exc_info=True)
         return {
             "statusCode": 500,
-            "body": json.dumps({
+            "body": dumps_json({
                 "error": "檔案匯出失敗",
                 "message": f"系統錯誤: {str(general_err)}"
-            }, ensure_ascii=False)
+            })
         }
\ No newline at end of file
@@ -1,5 +1,9 @@
 import re
-from html import unescape
+from lxml import html as lxml_html
+
+# split_by_h2 使用的正則表達式，於載入時編譯一次
+H2_RE = re.compile(r"(?i)<h2[^>]*>(.*?)</h2>")
+
 
 def build_cover(info: dict):
     """
@@ -20,7 +24,7 @@ def build_cover(info: dict):
 
 def split_by_h2(html: str):
     """將 HTML 按 <h2> 分段，回傳 [(title, html_block)]"""
-    blocks = re.split(r"(?i)<h2[^>]*>(.*?)</h2>", html)
+    blocks = H2_RE.split(html)
     if len(blocks) == 1: # 沒有 <h2>
         return [("內容", html)]
     return [(blocks[i], blocks[i+1] if i+1 < len(blocks) else "") 
@@ -28,48 +32,28 @@ def split_by_h2(html: str):
 
 
 def extract_text_blocks(html: str):
-    """從 HTML 中提取段落與清單內容，轉換為可用於 TXT 輸出的段落文字（含換行）"""
-    html = unescape(html)
-
-    paragraphs = []
-
-    # 將 <br> 轉為換行符
-    html = re.sub(r"(?i)<br\s*/?>", "\n", html)
-
-    # 提取 <p>
-    p_matches = re.findall(r"<p[^>]*>(.*?)</p>", html, re.DOTALL)
-    for match in p_matches:
-        cleaned = re.sub(r"<[^>]+>", "", match).strip()
-        if cleaned:
-            paragraphs.append(cleaned)
+    """從 HTML 中提取段落（依換行拆成多行）與清單項目（加上 "• " 前綴），回傳文字區塊清單"""
+    # 沒有任何標籤就不可能有 <p>/<li>，不必解析
+    if not html or "<" not in html:
+        return []
 
-    # 提取 <li>，合併為一塊帶項目符號的區段
-    li_matches = re.findall(r"<li[^>]*>(.*?)</li>", html, re.DOTALL)
-    if li_matches:
-        list_block = "\n".join([f"• {re.sub(r'<[^>]+>', '', li).strip()}" for li in li_matches])
-        paragraphs.append(list_block)
+    # 以 lxml（C 實作）解析一次，實體字元由解析器直接解碼
+    root = lxml_html.fragment_fromstring(html, create_parent="div")
 
-    return paragraphs
-
-
-import re
-from html import unescape
-
-def extract_text_blocks(html: str):
-    html = unescape(html)
-    html = re.sub(r"(?i)<br\s*/?>", "\n", html)
+    # <br> 轉為換行，讓段落可依行拆分
+    for br in root.iter("br"):
+        br.tail = "\n" + (br.tail or "")
 
     blocks = []
 
-    for p in re.findall(r"<p[^>]*>(.*?)</p>", html, re.DOTALL):
-        text = re.sub(r"<[^>]+>", "", p).strip()
+    for p in root.iter("p"):
+        text = p.text_content().strip()
         if text:
             blocks.extend([line.strip() for line in text.split("\n") if line.strip()])
 
-    li_matches = re.findall(r"<li[^>]*>(.*?)</li>", html, re.DOTALL)
-    for li in li_matches:
-        text = re.sub(r"<[^>]+>", "", li).strip()
+    for li in root.iter("li"):
+        text = li.text_content().strip()
         if text:
             blocks.append(f"• {text}")
 
-    return blocks
\ No newline at end of file
+    return blocks
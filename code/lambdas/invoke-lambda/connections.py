@@ -2,7 +2,11 @@
 import boto3
 from botocore.config import Config
 import json
+from functools import lru_cache
 from botocore.exceptions import BotoCoreError, ClientError
+# 同時呼叫 Bedrock Runtime 產生章節的最大執行緒數（連接池大小需與之一致）
+BEDROCK_MAX_CONCURRENCY = 16
+
 # Bedrock Runtime 配置 - 處理格式化任務
 runtime_config = Config(
     connect_timeout=20,     # 增加連接超時
@@ -10,7 +14,8 @@
     retries={
         "max_attempts": 2,  # 增加重試次數
         "mode": "adaptive"  # 使用自適應重試模式
-    }
+    },
+    max_pool_connections=BEDROCK_MAX_CONCURRENCY  # 預設 10 條，併發時多出的請求每次都要重建連線
 )
 
 # Agent 配置 (處理 internalServerException 問題)
@@ -28,12 +33,28 @@
 class Connections:
     REGION_NAME = os.environ["AWS_REGION"]
     
-    bedrock_client = boto3.client("bedrock-runtime", region_name=REGION_NAME, config=runtime_config)
     output_format_fm = "us.anthropic.claude-sonnet-4-20250514-v1:0"  # "us.anthropic.claude-sonnet-4-20250514-v1:0"
 
-    agent_client = boto3.client("bedrock-agent", region_name=REGION_NAME, config=agent_config)
-    agent_runtime_client = boto3.client("bedrock-agent-runtime", region_name=REGION_NAME, config=agent_config)
-    s3_resource = boto3.resource("s3", region_name=REGION_NAME)
+    # 各 client 於首次使用時才建立並快取，未用到的 client 不佔用冷啟動時間
+    @classmethod
+    @lru_cache(maxsize=1)
+    def bedrock_client(cls):
+        return boto3.client("bedrock-runtime", region_name=cls.REGION_NAME, config=runtime_config)
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def agent_client(cls):
+        return boto3.client("bedrock-agent", region_name=cls.REGION_NAME, config=agent_config)
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def agent_runtime_client(cls):
+        return boto3.client("bedrock-agent-runtime", region_name=cls.REGION_NAME, config=agent_config)
+
+    @classmethod
+    @lru_cache(maxsize=1)
+    def s3_resource(cls):
+        return boto3.resource("s3", region_name=cls.REGION_NAME)
 
     # ------ S3 Client ----------------------------------------
     REGION_NAME_FBMAPPING = os.environ["AWS_FBMAPPING_REGION"]
@@ -41,23 +62,32 @@ class Connections:
     if not SECRET_NAME:
         raise RuntimeError("環境變數 SECRET_NAME 未設定，無法讀取憑證")
 
-    try:
-        sm_client = boto3.client(
-            "secretsmanager",
-            region_name=REGION_NAME
+    @classmethod
+    @lru_cache(maxsize=1)
+    def s3_client_fbmapping(cls):
+        """
+        以 Secret 中的 IAM 金鑰建立 fbmapping 區域的 S3 client。
+
+        首次使用時才讀取 Secrets Manager，避免拖慢冷啟動；結果快取於
+        執行環境中，後續 warm invocation 直接沿用。
+        """
+        try:
+            sm_client = boto3.client(
+                "secretsmanager",
+                region_name=cls.REGION_NAME
+            )
+            secret_resp = sm_client.get_secret_value(SecretId=cls.SECRET_NAME)
+            secret_dict = json.loads(secret_resp["SecretString"])
+        except ClientError as e:
+            raise RuntimeError(f"讀取 Secret【{cls.SECRET_NAME}】失敗: {e}")
+
+        for k in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+            if k not in secret_dict:
+                raise RuntimeError(f"Secret 缺少 {k}")
+
+        session = boto3.Session(
+            aws_access_key_id = secret_dict["AWS_ACCESS_KEY_ID"],
+            aws_secret_access_key = secret_dict["AWS_SECRET_ACCESS_KEY"],
+            region_name = cls.REGION_NAME_FBMAPPING
         )
-        secret_resp = sm_client.get_secret_value(SecretId=SECRET_NAME)
-        secret_dict = json.loads(secret_resp["SecretString"])
-    except ClientError as e:
-        raise RuntimeError(f"讀取 Secret【{SECRET_NAME}】失敗: {e}")
-
-    for k in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
-        if k not in secret_dict:
-            raise RuntimeError(f"Secret 缺少 {k}")
-
-    session = boto3.Session(
-        aws_access_key_id = secret_dict["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key = secret_dict["AWS_SECRET_ACCESS_KEY"],
-        region_name = REGION_NAME_FBMAPPING
-    )
-    s3_client_fbmapping = session.client("s3")
\ No newline at end of file
+        return session.client("s3")
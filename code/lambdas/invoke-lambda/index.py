@@ -23,13 +23,15 @@
 import random
 import uuid
 import base64
-import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 
-from connections import Connections
+from connections import Connections, BEDROCK_MAX_CONCURRENCY
 from utils import (
     output_format_pt, 
     evaluation_prompt_en, 
     parse_json_from_text, 
+    loads_json,
     combine_html_from_json,
     get_heading_prefix
 )
@@ -39,6 +41,8 @@
 logger.setLevel(logging.INFO)
 
 _CURRENT_OUTPUT_FORMAT: Dict[str, Any] = {}
+# (subtopic 標題, subsubtopic 標題 | None) -> prompt，隨 _CURRENT_OUTPUT_FORMAT 一起重建
+_PROMPT_INDEX: Dict[Tuple[str, str | None], Any] = {}
 
 # ============ 環境變數 ============
 AGENT_ID: str = os.environ["AGENT_ID"]
@@ -46,11 +50,108 @@
 
 logger.info("Bedrock Agent ID: %s", AGENT_ID)
 
-# ============ AWS 連線 ============
-agent_client = Connections.agent_client
-agent_runtime_client = Connections.agent_runtime_client
-s3_resource = Connections.s3_resource
-s3_client_fbmapping = Connections.s3_client_fbmapping
+# Agent alias 很少變動，快取查詢結果，避免每次呼叫 Agent 都多一次 list_agent_aliases
+ALIAS_CACHE_TTL = 300  # 秒
+_ALIAS_CACHE: Tuple[str, float] | None = None
+_ALIAS_LOCK = threading.Lock()
+
+# 常用正則表達式，於載入時編譯一次
+_S3_HTTPS_RE = re.compile(r"https://([^.]*)\.s3[.-][^/]+/(.+)")
+_FILENAME_CLEAN_RE = re.compile(r"[_\-]+")
+
+# Vanna 圖檔併發下載的執行緒數
+S3_DOWNLOAD_WORKERS = 8
+
+# 失敗任務重試時的併發數（低於首輪，避免 Bedrock 持續節流）
+RETRY_MAX_CONCURRENCY = int(os.environ.get("RETRY_MAX_CONCURRENCY", "4"))
+
+# 單一章節呼叫 invoke_model 的總嘗試次數；首輪只用其中一部分，其餘留給重試輪，
+# 讓被限流的章節總耗時不超過原本單輪 8 次嘗試
+INVOKE_MAX_RETRIES = 8
+FIRST_PASS_MAX_RETRIES = 4
+
+# 章節整合 system prompt 的固定部分：不含任何任務相關內容，於載入時組好一次，
+# 送出時放在 system 最前面並標記 prompt caching（各任務的標題指示另外附在後面）
+_SYSTEM_STATIC_TMPL = """You are a market insight report integration assistant specializing in data structuring and visualization. 
+Your task is to transform raw analysis text into a structured JSON containing HTML-formatted report sections.
+
+IMPORTANT: Your output MUST be a valid JSON object with the specified {key_desc}.
+
+STRICT CONTENT RULES:
+- DO NOT fabricate or assume information that is not explicitly present in the provided raw analysis, unless handling a missing subtopic as described below.
+- You must extract and restructure content ONLY from the provided raw analysis text for all subtopics that have data. 
+- Do NOT extrapolate, infer, or augment the analysis with your own ideas unless explicitly instructed to do so in rule 3 below.
+- Do not exceed 1400 words. Do not fall below 1300 words.
+
+PRECISE INSTRUCTIONS:
+0. Your response MUST begin with a ```json code block, and contain ONLY the JSON object inside. Do not include any explanation, greeting, or comment before or after the JSON.
+1. YOUR RESPONSE MUST BE A VALID JSON OBJECT that matches the example format exactly.
+(Rules 2 and 3 are given in SECTION-SPECIFIC INSTRUCTIONS below.)
+4. your response must be COMPLETE, well-structured, and insightful. You are required to produce between 1300 and 1400 words in total output.
+5. your output should be designed to SCORE 3 in each of the following evaluation dimensions: {evaluation_prompt_en}
+6. Use only secure HTML (no scripts, iframes, or external resources).
+7. Ensure your final output is a properly formatted JSON object that can be parsed without errors.
+8. NEVER use raw quotation marks (single or double) inside HTML tags like <strong> or <em>. Escape or move them outside the tag.
+9. {language_rule}
+10. DO NOT generate img HTML or script tags"""
+
+SUBTOPIC_SYSTEM_STATIC = _SYSTEM_STATIC_TMPL.format(
+    key_desc="subtopic as key and HTML content as value",
+    evaluation_prompt_en=evaluation_prompt_en,
+    language_rule="繁體中文語氣",
+)
+SUBSUBTOPIC_SYSTEM_STATIC = _SYSTEM_STATIC_TMPL.format(
+    key_desc="subtopics as keys and HTML content as values",
+    evaluation_prompt_en=evaluation_prompt_en,
+    language_rule="繁體中文思維",
+)
+
+# 各任務的標題指示與 fallback HTML：模板於載入時定義一次，呼叫時以 format_map 填入標題
+SUBTOPIC_SECTION_TMPL = """SECTION-SPECIFIC INSTRUCTIONS:
+2. For the subtopic that has relevant data:
+- Create a key in the JSON with the exact subtopic name.
+- The value must be properly formatted HTML that includes:
+    - Section heading using `<h2>{prefix} {subtopic_title}</h2>`
+    - Content paragraphs using `<p>...</p>` 
+    - Lists using `<ul><li>...</li></ul>` for bullet points
+    - Important data highlighted with `<strong>` or `<em>` tags
+3. For subtopic that is missing information in the provided analysis:
+- FIRST, create an HTML block following this structure:
+    `<h2>{prefix} {subtopic_title}</h2>`
+- THEN, immediately continue by using your own general knowledge to generate a plausible, high-quality analysis for that subtopic in properly structured HTML, without requiring additional user input.
+
+REQUIRED OUTPUT FORMAT:
+```json
+{{
+"{subtopic_title}": "<h2>{prefix} {subtopic_title}</h2><p>...</p>"
+}}
+```"""
+
+SUBSUBTOPIC_SECTION_TMPL = """SECTION-SPECIFIC INSTRUCTIONS:
+2. For each subtopic that has relevant data:
+- Create a key in the JSON with the exact subtopic name.
+- The value must be properly formatted HTML that includes:
+    - Section heading using `<h3>{prefix} {subsubtopic_title}</h3>`
+    - Content paragraphs using `<p>...</p>` 
+    - Lists using `<ul><li>...</li></ul>` for bullet points
+    - Important data highlighted with `<strong>` or `<em>` tags
+3. For subtopics that are missing information in the provided analysis:
+- FIRST, create an HTML block following this structure:
+    `<h3>{prefix} {subsubtopic_title}</h3>`
+- THEN, immediately continue by using your own general knowledge to generate a plausible, high-quality analysis for that subtopic in properly structured HTML, without requiring additional user input.
+
+REQUIRED OUTPUT FORMAT:
+```json
+{{
+"{subsubtopic_title}": "<h3>{prefix} {subsubtopic_title}</h3><p>...</p>"
+}}
+```"""
+
+SECTION_FALLBACK_TMPL = """<{tag}>{prefix} {title}</{tag}>
+<div style="background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 8px; margin: 20px 0;">
+    <p><strong>⚠️ 內容生成中遇到技術問題</strong></p>
+    <p>此部分內容暫時無法顯示，系統正在處理中。</p>
+</div>"""
 
 # ---------------------------------------------------------------------
 # Agent helpers
@@ -71,16 +172,38 @@ def get_highest_agent_version_alias_id(
     str | None
         若找不到可用 alias，回傳 None。
     """
-    highest = -1
-    best_alias_id = None
-    for alias in list_resp.get("agentAliasSummaries", []):
-        rcfg = alias.get("routingConfiguration")
-        if rcfg:
-            ver = rcfg[0]["agentVersion"]
-            if ver.isdigit() and int(ver) > highest:
-                highest = int(ver)
-                best_alias_id = alias["agentAliasId"]
-    return best_alias_id
+    def _version(alias: Dict[str, Any]) -> int:
+        return int(alias["routingConfiguration"][0]["agentVersion"])
+
+    best = max(
+        (
+            a for a in list_resp.get("agentAliasSummaries", [])
+            if a.get("routingConfiguration")
+            and a["routingConfiguration"][0]["agentVersion"].isdigit()
+        ),
+        key=_version,
+        default=None,
+    )
+    return best["agentAliasId"] if best else None
+
+
+def _get_alias_id(ttl: float = ALIAS_CACHE_TTL) -> str | None:
+    """
+    取得版本最高的 alias id；結果快取 `ttl` 秒，過期才重新呼叫 list_agent_aliases。
+    找不到 alias 時不快取，下次呼叫會再查一次。
+    """
+    global _ALIAS_CACHE
+
+    with _ALIAS_LOCK:
+        if _ALIAS_CACHE and time.monotonic() - _ALIAS_CACHE[1] < ttl:
+            return _ALIAS_CACHE[0]
+
+        alias_id = get_highest_agent_version_alias_id(
+            Connections.agent_client().list_agent_aliases(agentId=AGENT_ID)
+        )
+        if alias_id:
+            _ALIAS_CACHE = (alias_id, time.monotonic())
+        return alias_id
 
 
 def build_prompt(user_input: str, topic: str, company_info: Dict[str, str]) -> str:
@@ -101,14 +224,12 @@ def invoke_agent(
     """
     呼叫 Bedrock Agent 並回傳 streaming response (generator 物件)。
     """
-    alias_id = get_highest_agent_version_alias_id(
-        agent_client.list_agent_aliases(agentId=AGENT_ID)
-    )
+    alias_id = _get_alias_id()
     if not alias_id:
         raise RuntimeError("❌ 找不到可用的 Agent Alias")
 
     prompt = build_prompt(user_input, topic, company_info)
-    return agent_runtime_client.invoke_agent(
+    return Connections.agent_runtime_client().invoke_agent(
         agentId=AGENT_ID,
         agentAliasId=alias_id,
         sessionId=session_id,
@@ -136,36 +257,57 @@ def get_agent_response(
     if "completion" not in streaming_resp:
         raise ValueError("Invalid response: missing `completion` field")
 
-    traces: List[Dict[str, Any]] = []
-    chunks: List[str] = []
+    chunks: List[bytes] = []
+    kb_sources: List[str] | None = None
+    web_sources: List[str] = []
+    vanna_result: list | None = None
 
-    # 逐條組裝文字 & 收集 trace
+    # 單次走訪 streaming response：文字 chunk 先收集 bytes，
+    # trace 則當場取出 KB 來源、Perplexity 來源與 Vanna 結果，不另外保留整份 trace
     for event in streaming_resp["completion"]:
-        if "trace" in event:
-            traces.append(event["trace"])
-        elif "chunk" in event:
-            chunks.append(event["chunk"]["bytes"].decode("utf-8", "ignore"))
+        if "chunk" in event:
+            chunks.append(event["chunk"]["bytes"])
+            continue
+        if "trace" not in event:
+            continue
+
+        try:
+            obs = _observation_from_trace(event["trace"])
+            if not obs:
+                continue
 
-    full_text = "".join(chunks)
+            # KB 來源：沿用第一筆 knowledgeBaseLookupOutput
+            if kb_sources is None:
+                kb_out = obs.get("knowledgeBaseLookupOutput")
+                if kb_out:
+                    kb_sources = [r["location"]["s3Location"]["uri"] for r in kb_out["retrievedReferences"]]
 
-    # ==== 收集來源 ====
-    sources: List[str] = []
-    try:
-        sources += extract_source_list_from_kb(traces)
-    except Exception as e:
-        logger.warning("extract KB refs error: %s", e)
+            ag_out = obs.get("actionGroupInvocationOutput")
+            if not ag_out:
+                continue
 
-    try:
-        sources += extract_source_list_from_perplexity(traces)
-    except Exception as e:
-        logger.warning("extract web refs error: %s", e)
+            # actionGroup 的 text 只解析一次，供 Perplexity 與 Vanna 共用
+            payload = _load_action_group_payload(ag_out)
+            web_sources.extend(_web_sources_from_payload(payload))
+
+            # Vanna 結果：沿用第一筆 ACTION_GROUP 中的 vanna_result_by_title
+            if not vanna_result and obs.get("type") == "ACTION_GROUP":
+                vanna_result = _vanna_result_from_output(ag_out, payload)
+        except Exception as e:
+            logger.warning("parse trace error: %s", e)
+
+    full_text = b"".join(chunks).decode("utf-8", "ignore")
+
+    # ==== 收集來源 ====
+    sources: List[str] = (kb_sources or []) + web_sources
 
     # ==== 解析 Vanna 圖表 ====
-    try:
-        txt2figure_results = extract_txt2figure_result_from_traces(traces)
-    except Exception as e:
-        logger.warning("extract Athena refs error: %s", e)
-        txt2figure_results = []
+    txt2figure_results: List[Dict[str, Any]] = []
+    if vanna_result:
+        try:
+            txt2figure_results = _build_txt2figure_results(vanna_result)
+        except Exception as e:
+            logger.warning("⚠️ Extract Athena refs failed: %s", e)
 
     # 僅在指定主題時，把「成功取得圖檔」的標題也列入來源
     if topic == "市場概況與趨勢":
@@ -185,82 +327,58 @@ def get_agent_response(
 # ---------------------------------------------------------------------
 # Athena-Txt2Figure 來源處理
 # ---------------------------------------------------------------------
-def extract_txt2figure_result_from_traces(traces: List[dict]) -> List[Dict[str, Any]]:
+def _observation_from_trace(trace: dict) -> Dict[str, Any] | None:
+    """取出 trace → orchestrationTrace → observation；路徑不存在時回傳 None（不配置暫時的空 dict）"""
+    inner = trace.get("trace")
+    orch = inner and inner.get("orchestrationTrace")
+    return orch and orch.get("observation")
+
+
+def _load_action_group_payload(ag_out: dict) -> Any:
+    """解析 actionGroupInvocationOutput.text；空字串或非 JSON 時回傳 None"""
+    text_blob = ag_out.get("text", "")
+    if not text_blob:
+        return None
+    if not isinstance(text_blob, str):
+        return text_blob
     try:
-        for trace in traces:
-            logger.info("extract_figure_from_traces - trace: %s", trace)
+        return loads_json(text_blob)
+    except json.JSONDecodeError:
+        return None
 
-            vanna_result = _extract_vanna_result_from_trace(trace)
-            if vanna_result:
-                processed_result = _process_vanna_result(vanna_result)
-                # 先補 suffix，再過濾沒有真正標題的
-                with_suffix  = _add_title_suffix(processed_result)
-                filtered_res = _filter_result_valid_title(with_suffix)
-                return filtered_res
 
-        return []
+def _build_txt2figure_results(vanna_result: list) -> List[Dict[str, Any]]:
+    """下載 Vanna 圖檔、補上標題後綴，並過濾沒有真正標題的圖表"""
+    processed_result = _process_vanna_result(vanna_result)
+    # 先補 suffix，再過濾沒有真正標題的
+    with_suffix  = _add_title_suffix(processed_result)
+    return _filter_result_valid_title(with_suffix)
 
-    except Exception as err:
-        logger.warning("⚠️ Extract Athena refs failed: %s", err)
-        return []
+
+def _flatten_vanna_by_title(vanna_by_title: dict) -> list:
+    """將 {title: result | [results]} 攤平成列表（一個 title 可能對應多個 SQL 結果）"""
+    result_list = []
+    for result_data in vanna_by_title.values():
+        if isinstance(result_data, list):
+            result_list.extend(result_data)
+        else:
+            result_list.append(result_data)
+    return result_list
 
 
-def _extract_vanna_result_from_trace(trace: dict) -> list | None:
+def _vanna_result_from_output(ag_out: dict, payload: Any) -> list | None:
     """
-    從 traces 中提取 vanna_result_by_title，轉換為列表格式。
+    從 ACTION_GROUP 輸出中提取 vanna_result_by_title，轉換為列表格式。
     支援新的多SQL結構。
     """
-    obs = (
-        trace.get("trace", {})
-            .get("orchestrationTrace", {})
-            .get("observation", {})
-    )
-
-    # 僅處理 ACTION_GROUP
-    if obs.get("type") != "ACTION_GROUP":
-        return None
-
-    ag_out = obs.get("actionGroupInvocationOutput", {})
-
     # 優先檢查 sessionAttributes
     session_attrs = ag_out.get("sessionAttributes", {})
-    if session_attrs and "vanna_result_by_title" in session_attrs:
-        vanna_by_title = session_attrs["vanna_result_by_title"]
-        if isinstance(vanna_by_title, dict):
-            # 將字典值轉換為列表，並處理可能的多個結果
-            result_list = []
-            for title, result_data in vanna_by_title.items():
-                if isinstance(result_data, list):
-                    # 如果一個 title 對應多個結果（多個 SQL）
-                    result_list.extend(result_data)
-                else:
-                    # 單個結果
-                    result_list.append(result_data)
-            return result_list
+    if session_attrs and isinstance(session_attrs.get("vanna_result_by_title"), dict):
+        return _flatten_vanna_by_title(session_attrs["vanna_result_by_title"])
 
-    # 回溯 text 欄位
-    text_blob = ag_out.get("text", "")
-    if not text_blob:
-        return None
-
-    try:
-        payload = json.loads(text_blob) if isinstance(text_blob, str) else text_blob
-    except json.JSONDecodeError:
-        return None
-
-    if isinstance(payload, dict) and "vanna_result_by_title" in payload:
-        vanna_by_title = payload["vanna_result_by_title"]
-        if isinstance(vanna_by_title, dict):
-            # 將字典值轉換為列表，並處理可能的多個結果
-            result_list = []
-            for title, result_data in vanna_by_title.items():
-                if isinstance(result_data, list):
-                    # 如果一個 title 對應多個結果（多個 SQL）
-                    result_list.extend(result_data)
-                else:
-                    # 單個結果
-                    result_list.append(result_data)
-            return result_list
+    # 回溯 text 欄位（已由呼叫端解析成 payload）
+    if isinstance(payload, dict) and isinstance(payload.get("vanna_result_by_title"), dict):
+        return _flatten_vanna_by_title(payload["vanna_result_by_title"])
 
     return None
 
@@ -275,7 +393,7 @@ def _parse_s3_uri(uri: str) -> Tuple[str, str]:
     if uri.startswith("s3://"):
         bucket, key = uri.replace("s3://", "", 1).split("/", 1)
     else:
-        m = re.match(r"https://([^.]*)\.s3[.-][^/]+/(.+)", uri)
+        m = _S3_HTTPS_RE.match(uri)
         if not m:
             logger.error("Unsupported S3 URI format: %s", uri)
             raise ValueError(f"Unsupported S3 URI format: {uri}")
@@ -285,7 +403,7 @@ def _parse_s3_uri(uri: str) -> Tuple[str, str]:
     return bucket, key
 
 def _download_from_s3(bucket: str, key: str) -> bytes:
-    response = s3_client_fbmapping.get_object(Bucket=bucket, Key=key)
+    response = Connections.s3_client_fbmapping().get_object(Bucket=bucket, Key=key)
     ctype = response.get("ContentType", "")
     logger.debug("Content-Type: %s", ctype)
 
@@ -302,44 +420,59 @@ def _fetch_s3_object_as_bytes(uri: str) -> bytes:
     bucket, key = _parse_s3_uri(uri)
     return _download_from_s3(bucket, key)
 
-def _process_vanna_result(vanna_result: List[dict]) -> List[dict]:
-    """
-    遞迴掃描 vanna_result；遇到 img_html=S3 URI 就下載，
-    並轉成 {"bytes": ..., "b64": ...}。
-    """
+def _download_img_html(uri: str) -> Dict[str, Any] | None:
+    """下載單一 img_html 並轉成 {"bytes": ...}；失敗時回傳 None"""
+    logger.info("Fetching S3 object for key 'img_html': %s", uri)
+    try:
+        raw = _fetch_s3_object_as_bytes(uri)
+    except Exception as exc:
+        # 不 raise，讓後續流程不中斷
+        logger.warning("Failed to fetch S3 object: %s", exc)
+        return None
+    logger.debug("Successfully converted 'img_html' (%d bytes)", len(raw))
+    # 下載的是 plotly HTML，後續直接以 bytes 使用，不預先做 base64 編碼
+    return {"bytes": raw}
 
-    def _transform(node: Any) -> Any:
-        # Dict ───────────────────────────────────────────────────────────
+
+def _find_img_html_slots(root: Any) -> List[Tuple[dict, str]]:
+    """以明確的 stack 走訪整棵樹，回傳所有 (所屬 dict, img_html URI)"""
+    slots: List[Tuple[dict, str]] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
         if isinstance(node, dict):
-            new_node: Dict[str, Any] = {}
             for k, v in node.items():
                 if k == "img_html" and isinstance(v, str) and v:
-                    logger.info("Fetching S3 object for key '%s': %s", k, v)
-                    try:
-                        raw = _fetch_s3_object_as_bytes(v)
-                        new_node[k] = {
-                            "bytes": raw,
-                            "b64": base64.b64encode(raw).decode()
-                        }
-                        logger.debug("Successfully converted '%s' (%d bytes)", k, len(raw))
-                    except Exception as exc:
-                        # 不 raise，讓後續流程不中斷
-                        logger.warning("Failed to fetch S3 object: %s", exc)
-                        new_node[k] = None
-                else:
-                    new_node[k] = _transform(v)
-            return new_node
+                    slots.append((node, v))
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (dict, list)))
+    return slots
 
-        # List ────────────────────────────────────────────────────────────
-        if isinstance(node, list):
-            return [_transform(item) for item in node]
 
-        # Scalar ──────────────────────────────────────────────────────────
-        return node
+def _process_vanna_result(vanna_result: List[dict]) -> List[dict]:
+    """
+    掃描 vanna_result；遇到 img_html=S3 URI 就下載，
+    並就地替換成 {"bytes": ...}，回傳的就是傳入的 vanna_result。
+    所有圖檔先收集後再併發下載，總耗時約為單次 S3 往返而非逐一累加。
+    """
+    slots = _find_img_html_slots(vanna_result)
+    uris = list(dict.fromkeys(uri for _, uri in slots))
+
+    if uris:
+        # 先在主執行緒建立 client，避免多個 worker 同時讀取 Secret
+        Connections.s3_client_fbmapping()
+        with ThreadPoolExecutor(
+            max_workers=min(S3_DOWNLOAD_WORKERS, len(uris))
+        ) as exe:
+            downloaded = dict(zip(uris, exe.map(_download_img_html, uris)))
+
+        for node, uri in slots:
+            node["img_html"] = downloaded[uri]
 
-    processed = _transform(vanna_result)
     logger.info("Finished converting vanna_result (total items: %d)", len(vanna_result))
-    return processed
+    return vanna_result
 
 def _add_title_suffix(result: List[dict], suffix: str = "(發票數據)") -> List[dict]:
     """
@@ -381,33 +514,18 @@ def _filter_result_valid_title(result: List[dict], suffix: str = "(發票數據)
 # ---------------------------------------------------------------------
 # Knowledge-Base 來源處理
 # ---------------------------------------------------------------------
-def extract_source_list_from_kb(traces: List[dict]) -> List[str]:
-    """
-    從 KB Trace 萃取 S3 URI list。
-    """
-    for t in traces:
-        obs = (
-            t.get("trace", {})
-            .get("orchestrationTrace", {})
-            .get("observation", {})
-        )
-        kb_out = obs.get("knowledgeBaseLookupOutput")
-        if kb_out:
-            return [r["location"]["s3Location"]["uri"] for r in kb_out["retrievedReferences"]]
-    return []
-
-
 def clean_and_dedup_uris(uris: list[str]) -> list[str]:
-    seen = set()
-    deduped = []
+    # 零或一筆時不可能重複，只需濾掉空值
+    if len(uris) <= 1:
+        return [u for u in uris if u and isinstance(u, str)]
+
+    # 以正規化後的 URI 為 key，保留第一次出現的原始 URI（dict 保持插入順序）
+    by_norm: Dict[str, str] = {}
     for u in uris:
         if not u or not isinstance(u, str):
             continue
-        norm = unquote(u.strip().lower())
-        if norm not in seen:
-            seen.add(norm)
-            deduped.append(u)
-    return deduped
+        by_norm.setdefault(unquote(u.strip().lower()), u)
+    return list(by_norm.values())
 
 
 def source_link(uris: list[str]) -> str:
@@ -434,7 +552,7 @@ def source_link(uris: list[str]) -> str:
 
             filename = item.rsplit("/", 1)[-1]
             filename = unquote(filename)
-            filename = re.sub(r"[_\-]+", " ", filename).strip()
+            filename = _FILENAME_CLEAN_RE.sub(" ", filename).strip()
             # safe_item = html.escape(item)
             safe_item = item
 
@@ -460,32 +578,15 @@ def source_link(uris: list[str]) -> str:
 # ---------------------------------------------------------------------
 # Web-Search 來源處理
 # ---------------------------------------------------------------------
-def extract_source_list_from_perplexity(traces: List[dict]) -> List[str]:
+def _web_sources_from_payload(payload: Any) -> List[str]:
     """
-    從 Perplexity Trace 中擷取外部來源連結。
-    尋找 trace → orchestrationTrace → observation → actionGroupInvocationOutput.text，
-    若該段落為 JSON 格式且含有 'response.sources'，即視為 Perplexity 結果。
+    從已解析的 actionGroupInvocationOutput.text 擷取外部來源連結。
+    若該段落為 JSON 物件且含有 'response.sources'，即視為 Perplexity 結果。
     """
-    sources = []
-
-    for t in traces:
-        obs = (
-            t.get("trace", {})
-             .get("orchestrationTrace", {})
-             .get("observation", {})
-        )
-        text = obs.get("actionGroupInvocationOutput", {}).get("text", "")
-
-        try:
-            payload = json.loads(text)
-            if isinstance(payload, dict):
-                source_list = payload.get("response", {}).get("sources", [])
-                if isinstance(source_list, list):
-                    sources.extend(source_list)
-        except json.JSONDecodeError:
-            continue  # 跳過非 JSON 格式
-
-    return sources
+    if not isinstance(payload, dict):
+        return []
+    source_list = payload.get("response", {}).get("sources", [])
+    return source_list if isinstance(source_list, list) else []
 
 # ---------------------------------------------------------------------
 # Claude Sonnet – 產生 HTML/JSON 報告
@@ -537,7 +638,7 @@ def build_output_format(
     txt2figure_results: List[Dict[str, Any]],
     company_info: Dict[str, str]
 ) -> Dict[str, Any]:
-    global _CURRENT_OUTPUT_FORMAT
+    global _CURRENT_OUTPUT_FORMAT, _PROMPT_INDEX
 
     # 依照 company_info 自動重新生成
     if (_CURRENT_OUTPUT_FORMAT.get("_meta_company_info") != company_info):
@@ -548,6 +649,7 @@ def build_output_format(
             input_product_category=company_info.get("商品類型", "")
         )
         _CURRENT_OUTPUT_FORMAT["_meta_company_info"] = company_info
+        _PROMPT_INDEX = _build_prompt_index(_CURRENT_OUTPUT_FORMAT)
 
     # ------------------------------------------------------------------
     # 驗證與基本變數
@@ -580,8 +682,16 @@ def build_output_format(
     # ------------------------------------------------------------------
     # 插入 Vanna 圖表
     # ------------------------------------------------------------------
+    # 找不到對應標題時的備援位置：第一個非 header 的 key，只需計算一次
+    fallback_key = next((k for k in sorted(result) if not k.endswith("_header")), None)
+
+    # 各 section 的圖表片段先收集成 list，最後每個 section 只串接一次
+    chart_fragments: Dict[str, List[str]] = {}
     for chart in txt2figure_results:
-        _insert_chart(chart, result, title_to_key, path_to_key, charts, word_charts)
+        _insert_chart(chart, fallback_key, title_to_key, path_to_key, charts, word_charts, chart_fragments)
+
+    for key, fragments in chart_fragments.items():
+        result[key] = "".join([result[key], *fragments])
 
     return {"content": result, "charts": charts, "word_charts": word_charts}
 
@@ -615,14 +725,19 @@ def _generate_sections_html(
     completed: List[Tuple] = []
     failed: List[Tuple] = []
 
-    def _worker(task):
-        return call_model_unified(task, raw_analysis)
+    # 首輪失敗時回傳空 HTML 以便重試；重試仍失敗才使用 fallback 內容
+    def _worker(task, with_fallback=False, max_retries=FIRST_PASS_MAX_RETRIES):
+        return call_model_unified(
+            task, raw_analysis, with_fallback=with_fallback, max_retries=max_retries
+        )
 
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=min(16, len(tasks))
+    # 先在主執行緒建立 client，避免冷啟動時多個 worker 同時各自建立（lru_cache 不會序列化首次建立）
+    Connections.bedrock_client()
+    with ThreadPoolExecutor(
+        max_workers=min(BEDROCK_MAX_CONCURRENCY, len(tasks))
     ) as exe:
         future_to_task = {exe.submit(_worker, t): t for t in tasks}
-        for fut in concurrent.futures.as_completed(future_to_task):
+        for fut in as_completed(future_to_task):
             task = future_to_task[fut]
             try:
                 r = fut.result()
@@ -633,14 +748,19 @@ def _worker(task):
             except Exception:
                 failed.append(task)
 
-    # 若仍有失敗任務，再走一次同步重試
-    for task in failed:
-        try:
-            r = call_model_unified(task, raw_analysis)
-            if r and r[5]:
-                completed.append(r)
-        except Exception:
-            pass
+    # 若仍有失敗任務，再重試一次：同樣併發送出，但降低併發數以免再次被限流
+    if failed:
+        with ThreadPoolExecutor(
+            max_workers=min(RETRY_MAX_CONCURRENCY, len(failed))
+        ) as exe:
+            retry_attempts = INVOKE_MAX_RETRIES - FIRST_PASS_MAX_RETRIES
+            for fut in as_completed([exe.submit(_worker, t, True, retry_attempts) for t in failed]):
+                try:
+                    r = fut.result()
+                    if r and r[5]:
+                        completed.append(r)
+                except Exception:
+                    pass
 
     # --------- 3. 組裝 HTML ---------
     # 依舊的邏輯整理 header / content，確保順序正確
@@ -670,8 +790,8 @@ def _worker(task):
     return sections
 
 
-def _insert_chart(chart, result, title_to_key, path_to_key, charts, word_charts) -> None:
-    """把單一 chart 依規則插進 HTML，並填 chart / word_charts dict"""
+def _insert_chart(chart, fallback_key, title_to_key, path_to_key, charts, word_charts, chart_fragments) -> None:
+    """把單一 chart 依規則決定插入位置（片段暫存於 chart_fragments），並填 chart / word_charts dict"""
     chart_id = chart.get("chart_id") or uuid.uuid4().hex[:8]
     title_text = chart.get("title_text", f"圖表-{chart_id}")
     img_html = chart.get("img_html")
@@ -702,14 +822,14 @@ def _insert_chart(chart, result, title_to_key, path_to_key, charts, word_charts)
     }
 
     # --- 決定放哪 ---
-    target_key = _find_target_key(chart, title_to_key, path_to_key, result)
+    target_key = _find_target_key(chart, title_to_key, path_to_key, fallback_key)
     if not target_key:
         logger.error("no place for chart: %s", title_text)
         return
 
     # --- 寫佔位符、收資料 ---
     html_plh = create_chart_placeholder(chart_id)
-    result[target_key] += (
+    chart_fragments.setdefault(target_key, []).append(
         f"\n{html_plh}\n<div class='word-chart-placeholder'>[WORD_CHART_{chart_id}]</div>\n"
     )
 
@@ -733,13 +853,15 @@ def _insert_chart(chart, result, title_to_key, path_to_key, charts, word_charts)
 def _prepare_bytes_b64(img_html):
     """dict/bytes/URL 統一回 (bytes, b64_str | None)"""
     if isinstance(img_html, dict):
-        return img_html.get("bytes"), img_html.get("b64")
+        b = img_html.get("bytes")
+        b64 = img_html.get("b64") or (base64.b64encode(b).decode() if b else None)
+        return b, b64
     if isinstance(img_html, (bytes, bytearray)):
         b = bytes(img_html)
         return b, base64.b64encode(b).decode()
     return None, None  # URL
 
-def _find_target_key(chart, title_to_key, path_to_key, result):
+def _find_target_key(chart, title_to_key, path_to_key, fallback_key):
     """依五層優先序找 section key"""
 
     # 1. 直接比對 target_path
@@ -749,15 +871,17 @@ def _find_target_key(chart, title_to_key, path_to_key, result):
 
     # 2 context
     ctx = chart.get("context", "")
-    for t, k in title_to_key.items():
-        if t in ctx:
-            return k
+    if ctx:
+        for t, k in title_to_key.items():
+            if t in ctx:
+                return k
 
-    # 3 question
+    # 3 question（context 通常就是 question 本身，相同時不必再掃一次）
     q = chart.get("question", "")
-    for t, k in title_to_key.items():
-        if t in q:
-            return k
+    if q and q != ctx:
+        for t, k in title_to_key.items():
+            if t in q:
+                return k
 
     # 4 title_text
     tt = chart.get("title_text", "").replace("(發票數據)", "").strip()
@@ -765,11 +889,8 @@ def _find_target_key(chart, title_to_key, path_to_key, result):
         if tt in t or t in tt:
             return k
 
-    # 5 fallback：第一個非 header 的 key
-    for k in sorted(result):
-        if not k.endswith("_header"):
-            return k
-    return None
+    # 5 fallback：第一個非 header 的 key（由呼叫端預先算好）
+    return fallback_key
 
 # ------------------------------------------------------------------
 # ------------------------------------------------------------------
@@ -783,8 +904,12 @@ def extract_page_name_from_key(key: str) -> str:
         return parts[3]
     return "unknown_page"
 
-def call_model_unified(task_info, raw_analysis, task_id=""):
-    """帶重試機制的統一任務處理函數"""
+def call_model_unified(task_info, raw_analysis, task_id="", with_fallback=True, max_retries=INVOKE_MAX_RETRIES):
+    """
+    帶重試機制的統一任務處理函數。
+    失敗時若 with_fallback 為 False，回傳的 HTML 為空字串，交由呼叫端決定是否重試；
+    max_retries 為呼叫 invoke_model 的最多嘗試次數。
+    """
     task_type, subtopic_idx, subtopic_title, subsubtopic_idx, subsubtopic_title = task_info
     
     # 基於任務總索引進行錯開
@@ -803,92 +928,18 @@ def call_model_unified(task_info, raw_analysis, task_id=""):
     
     logger.info(f"處理任務 [{task_type}] [{subtopic_title}] -> {target_title or '(子標題內容)'}")
     
-    # 構建system_prompt - 簡化版本，不再包含具體任務描述
+    # 固定規則放在 system（模組常數，可被 prompt caching 重用）；各任務不同的標題指示隨 user 訊息送出
     if task_type == "subtopic":
-        system_prompt = f"""You are a market insight report integration assistant specializing in data structuring and visualization. 
-Your task is to transform raw analysis text into a structured JSON containing HTML-formatted report sections.
-
-IMPORTANT: Your output MUST be a valid JSON object with the specified subtopic as key and HTML content as value.
-
-STRICT CONTENT RULES:
-- DO NOT fabricate or assume information that is not explicitly present in the provided raw analysis, unless handling a missing subtopic as described below.
-- You must extract and restructure content ONLY from the provided raw analysis text for all subtopics that have data. 
-- Do NOT extrapolate, infer, or augment the analysis with your own ideas unless explicitly instructed to do so in rule 3 below.
-- Do not exceed 1400 words. Do not fall below 1300 words.
-
-PRECISE INSTRUCTIONS:
-0. Your response MUST begin with a ```json code block, and contain ONLY the JSON object inside. Do not include any explanation, greeting, or comment before or after the JSON.
-1. YOUR RESPONSE MUST BE A VALID JSON OBJECT that matches the example format exactly.
-2. For the subtopic that has relevant data:
-- Create a key in the JSON with the exact subtopic name.
-- The value must be properly formatted HTML that includes:
-    - Section heading using `<h2>{prefix} {subtopic_title}</h2>`
-    - Content paragraphs using `<p>...</p>` 
-    - Lists using `<ul><li>...</li></ul>` for bullet points
-    - Important data highlighted with `<strong>` or `<em>` tags
-3. For subtopic that is missing information in the provided analysis:
-- FIRST, create an HTML block following this structure:
-    `<h2>{prefix} {subtopic_title}</h2>`
-- THEN, immediately continue by using your own general knowledge to generate a plausible, high-quality analysis for that subtopic in properly structured HTML, without requiring additional user input.
-4. your response must be COMPLETE, well-structured, and insightful. You are required to produce between 1300 and 1400 words in total output.
-5. your output should be designed to SCORE 3 in each of the following evaluation dimensions: {evaluation_prompt_en}
-6. Use only secure HTML (no scripts, iframes, or external resources).
-7. Ensure your final output is a properly formatted JSON object that can be parsed without errors.
-8. NEVER use raw quotation marks (single or double) inside HTML tags like <strong> or <em>. Escape or move them outside the tag.
-9. 繁體中文語氣
-10. DO NOT generate img HTML or script tags
-
-REQUIRED OUTPUT FORMAT:
-```json
-{{
-"{subtopic_title}": "<h2>{prefix} {subtopic_title}</h2><p>...</p>"
-}}
-```"""
+        system_static = SUBTOPIC_SYSTEM_STATIC
+        section_prompt = SUBTOPIC_SECTION_TMPL.format_map({"prefix": prefix, "subtopic_title": subtopic_title})
     else:
-        system_prompt = f"""You are a market insight report integration assistant specializing in data structuring and visualization. 
-Your task is to transform raw analysis text into a structured JSON containing HTML-formatted report sections.
-
-IMPORTANT: Your output MUST be a valid JSON object with the specified subtopics as keys and HTML content as values.
-
-STRICT CONTENT RULES:
-- DO NOT fabricate or assume information that is not explicitly present in the provided raw analysis, unless handling a missing subtopic as described below.
-- You must extract and restructure content ONLY from the provided raw analysis text for all subtopics that have data. 
-- Do NOT extrapolate, infer, or augment the analysis with your own ideas unless explicitly instructed to do so in rule 3 below.
-- Do not exceed 1400 words. Do not fall below 1300 words.
-
-PRECISE INSTRUCTIONS:
-0. Your response MUST begin with a ```json code block, and contain ONLY the JSON object inside. Do not include any explanation, greeting, or comment before or after the JSON.
-1. YOUR RESPONSE MUST BE A VALID JSON OBJECT that matches the example format exactly.
-2. For each subtopic that has relevant data:
-- Create a key in the JSON with the exact subtopic name.
-- The value must be properly formatted HTML that includes:
-    - Section heading using `<h3>{prefix} {subsubtopic_title}</h3>`
-    - Content paragraphs using `<p>...</p>` 
-    - Lists using `<ul><li>...</li></ul>` for bullet points
-    - Important data highlighted with `<strong>` or `<em>` tags
-3. For subtopics that are missing information in the provided analysis:
-- FIRST, create an HTML block following this structure:
-    `<h3>{prefix} {subsubtopic_title}</h3>`
-- THEN, immediately continue by using your own general knowledge to generate a plausible, high-quality analysis for that subtopic in properly structured HTML, without requiring additional user input.
-4. your response must be COMPLETE, well-structured, and insightful. You are required to produce between 1300 and 1400 words in total output.
-5. your output should be designed to SCORE 3 in each of the following evaluation dimensions: {evaluation_prompt_en}
-6. Use only secure HTML (no scripts, iframes, or external resources).
-7. Ensure your final output is a properly formatted JSON object that can be parsed without errors.
-8. NEVER use raw quotation marks (single or double) inside HTML tags like <strong> or <em>. Escape or move them outside the tag.
-9. 繁體中文思維
-10. DO NOT generate img HTML or script tags
-
-REQUIRED OUTPUT FORMAT:
-```json
-{{
-"{subsubtopic_title}": "<h3>{prefix} {subsubtopic_title}</h3><p>...</p>"
-}}
-```"""
+        system_static = SUBSUBTOPIC_SYSTEM_STATIC
+        section_prompt = SUBSUBTOPIC_SECTION_TMPL.format_map({"prefix": prefix, "subsubtopic_title": subsubtopic_title})
     
     try:
         start_time = time.time()
         # 將 subtopic_prompt 加入 user input
-        raw_text = get_response_invoke(system_prompt, raw_analysis, subtopic_prompt, task_id)
+        raw_text = get_response_invoke(system_static, section_prompt, raw_analysis, subtopic_prompt, task_id, max_retries)
         
         if not raw_text.strip():
             raise Exception("返回內容為空")
@@ -907,41 +958,51 @@ def call_model_unified(task_info, raw_analysis, task_id=""):
     except Exception as err:
         logger.warning(f"⚠️ 任務處理失敗 [{task_type}] [{subtopic_title}] -> {target_title or '(子標題內容)'}: {err}")
         
+        if not with_fallback:
+            return task_type, subtopic_idx, subtopic_title, subsubtopic_idx, target_title, ""
+
         # 生成fallback內容
-        if task_type == "subtopic":
-            fallback = f"""<h2>{prefix} {subtopic_title}</h2>
-<div style="background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 8px; margin: 20px 0;">
-    <p><strong>⚠️ 內容生成中遇到技術問題</strong></p>
-    <p>此部分內容暫時無法顯示，系統正在處理中。</p>
-</div>"""
-        else:
-            fallback = f"""<h3>{prefix} {subsubtopic_title}</h3>
-<div style="background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 8px; margin: 20px 0;">
-    <p><strong>⚠️ 內容生成中遇到技術問題</strong></p>
-    <p>此部分內容暫時無法顯示，系統正在處理中。</p>
-</div>"""
+        fallback = SECTION_FALLBACK_TMPL.format_map({
+            "tag": f"h{heading_level}",
+            "prefix": prefix,
+            "title": target_title,
+        })
         
         return task_type, subtopic_idx, subtopic_title, subsubtopic_idx, target_title, fallback
 
-def get_response_invoke(system_prompt: str, raw_analysis: str, subtopic_prompt: str, task_id: str = "") -> str:
-    # 將 subtopic_prompt 加入 user input
-    user_content = f"分析任務：{subtopic_prompt}\n\nAI Agent-Extracted Market Insights：\n{raw_analysis}"
-    messages = [{"role": "user", "content": user_content}]
+def get_response_invoke(system_static: str, section_prompt: str, raw_analysis: str, subtopic_prompt: str, task_id: str = "", max_retries: int = INVOKE_MAX_RETRIES) -> str:
+    # system 只放固定規則：所有請求共用，標記 prompt caching 後跨請求也能命中
+    system = [
+        {
+            "type": "text",
+            "text": system_static,
+            "cache_control": {"type": "ephemeral"},
+        },
+    ]
+    # raw_analysis 含網路搜尋來的內容，仍作為 user 輸入而非 system 指示。
+    # 不對它標記 prompt caching：各任務幾乎同時送出，快取要等第一個回應開始後才可讀取，
+    # 首輪的每個任務都只會付出寫入快取的額外費用而讀不到
+    messages = [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": f"AI Agent-Extracted Market Insights：\n{raw_analysis}"},
+            {"type": "text", "text": f"{section_prompt}\n\n分析任務：{subtopic_prompt}"},
+        ],
+    }]
      
     body = json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
-        "system": system_prompt,
+        "system": system,
         "messages": messages,
         "max_tokens": 4096,
         "temperature": 0.3,
     })
 
-    max_retries = 8
     base_wait = 1.0
     
     for attempt in range(max_retries):
         try:
-            resp = Connections.bedrock_client.invoke_model(
+            resp = Connections.bedrock_client().invoke_model(
                 body=body,
                 modelId=Connections.output_format_fm,
             )
@@ -976,67 +1037,31 @@ def get_response_invoke(system_prompt: str, raw_analysis: str, subtopic_prompt:
     logger.error(f"❌ 任務 {task_id} 最多重試次數已達，放棄")
     return ""
 
-def get_subtopic_prompt(subtopic_title: str) -> str:
-    # 直接從快取拿
-    for main_topic, main_data in _CURRENT_OUTPUT_FORMAT.items():
+def _build_prompt_index(output_format: Dict[str, Any]) -> Dict[Tuple[str, str | None], Any]:
+    """
+    將 output_format 攤平成 prompt 索引，讓每個任務以一次 dict 查詢取得 prompt，
+    不必每次都掃過所有主題。同名標題以第一個出現者為準；沒有 prompt 欄位時
+    直接存入預設文字，有欄位則原樣保留（即使為空），與逐一搜尋的結果相同。
+    """
+    index: Dict[Tuple[str, str | None], Any] = {}
+    for main_data in output_format.values():
+        if not isinstance(main_data, dict):
+            continue
         for subtopic in main_data.get("subtopics", []):
-            if subtopic["title"] == subtopic_title:
-                return subtopic.get("prompt", f"請分析 {subtopic_title} 相關內容")
-    return f"請分析 {subtopic_title} 相關內容"
+            s_title = subtopic["title"]
+            index.setdefault((s_title, None), subtopic.get("prompt", f"請分析 {s_title} 相關內容"))
+            for subsub in subtopic.get("subsubtopics", []):
+                if isinstance(subsub, dict) and "title" in subsub:
+                    ss_title = subsub["title"]
+                    index.setdefault((s_title, ss_title), subsub.get("prompt", f"請分析 {ss_title} 相關內容"))
+    return index
+
+def get_subtopic_prompt(subtopic_title: str) -> str:
+    # 直接從快取的索引拿
+    return _PROMPT_INDEX.get((subtopic_title, None), f"請分析 {subtopic_title} 相關內容")
 
 def get_subsubtopic_prompt(subtopic_title: str, subsubtopic_title: str) -> str:
-    for main_topic, main_data in _CURRENT_OUTPUT_FORMAT.items():
-        for subtopic in main_data.get("subtopics", []):
-            if subtopic["title"] == subtopic_title:
-                for subsub in subtopic.get("subsubtopics", []):
-                    if isinstance(subsub, dict) and subsub.get("title") == subsubtopic_title:
-                        return subsub.get("prompt", f"請分析 {subsubtopic_title} 相關內容")
-    return f"請分析 {subsubtopic_title} 相關內容"
-
-def retry_failed_tasks(failed_tasks, raw_analysis, max_retry_rounds=2):
-    """重新執行失敗的任務，使用更保守的策略"""
-    retry_round = 0
-    remaining_failed = failed_tasks.copy()
-    successful_results = []
-    
-    while remaining_failed and retry_round < max_retry_rounds:
-        retry_round += 1
-        logger.info(f"🔄 第 {retry_round} 輪重試，處理 {len(remaining_failed)} 個失敗任務")
-        
-        # 使用單線程重試，避免再次限流
-        for task_info in remaining_failed:
-            try:
-                # 增加任務間隔，避免限流
-                time.sleep(random.uniform(2, 5))
-                
-                task_type, subtopic_idx, subtopic_title, subsubtopic_idx, subsubtopic_title = task_info
-                
-                # 生成任務ID用於重試
-                if task_type == "subtopic":
-                    target_title = subtopic_title
-                    task_id = f"retry_{retry_round}_{subtopic_title}"
-                else:
-                    target_title = subsubtopic_title
-                    task_id = f"retry_{retry_round}_{subsubtopic_title}"
-                
-                logger.info(f"🔄 重試任務: {task_id}")
-                
-                # 重新調用原有的任務處理邏輯
-                result_tuple = call_model_unified(task_info, raw_analysis, task_id)
-                
-                if result_tuple and result_tuple[5]:  # 檢查是否有有效內容
-                    successful_results.append(result_tuple)
-                    logger.info(f"✅ 重試成功: {task_id}")
-                else:
-                    logger.warning(f"⚠️ 重試仍失敗: {task_id}")
-                    
-            except Exception as e:
-                logger.error(f"❌ 重試過程中出錯: {task_info}, 錯誤: {e}")
-        
-        # 更新失敗列表（簡化版本，實際可根據需要優化）
-        remaining_failed = []  # 簡化：不再重複重試同一任務
-        
-    return successful_results
+    return _PROMPT_INDEX.get((subtopic_title, subsubtopic_title), f"請分析 {subsubtopic_title} 相關內容")
 
 def inject_charts_into_html(html_content: str, chart_data: Dict[str, Any]) -> str:
     if not chart_data:
@@ -1095,7 +1120,9 @@ def lambda_handler(event: Dict[str, Any], context):
     3. 用 Claude 4 Sonnet 轉 JSON+HTML
     4. 智能插入圖表並組合來源 / HTML 回傳給前端
     """
-    logger.info("Event: %s", json.dumps(event, ensure_ascii=False))
+    # json.dumps 不受 %s 延遲格式化保護，先確認 INFO 有開啟再序列化
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Event: %s", json.dumps(event, ensure_ascii=False))
 
     body = event.get("body", {})
     query: str = body.get("query", "")
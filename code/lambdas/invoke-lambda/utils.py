@@ -657,10 +657,32 @@ def output_format_pt(input_company, input_brand, input_product, input_product_ca
 
 
 import json, re, html
+from functools import lru_cache
 from typing import Any, Dict
 
+# JSON 解析：優先使用 orjson（C 實作），未安裝時退回標準庫
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads_json(text):
+    """
+    以 orjson 解析 JSON；orjson 不接受 NaN / Infinity 等標準庫可解析的寫法，
+    解析失敗時改用 json.loads 再試一次（錯誤訊息與例外型別也與標準庫一致）。
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
 _JSON_BLOCK = re.compile(r'```json\s*([\s\S]+?)\s*```', re.I)
 _CURLY_BLOCK = re.compile(r'\{[\s\S]+\}')
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+_JSON_STRING = re.compile(r'"(?:\\.|[^"\\])*"')
+_QUOTE_TABLE = str.maketrans("“”‘’", '""\'\'')
 
 def extract_first_json(text: str) -> str:
     """從文字中抓出第一段 JSON 區塊。若找不到就 raise ValueError。"""
@@ -674,13 +696,13 @@ def extract_first_json(text: str) -> str:
 def sanitize_json(raw: str) -> str:
     """最基本的清理：逗號、中文引號、BOM，並把字串中的裸換行替換掉。"""
     s = raw.lstrip("\ufeff")
-    s = re.sub(r",\s*([\]}])", r"\1", s)  # 去掉 ,  }  或 , ]
-    s = s.translate(str.maketrans("“”‘’", '""\'\''))  # 中文引號 → 英文
+    s = _TRAILING_COMMA.sub(r"\1", s)  # 去掉 ,  }  或 , ]
+    s = s.translate(_QUOTE_TABLE)  # 中文引號 → 英文
 
     # 只在 "字串常量" 內把裸 \n / \r 換成空格，避免 json.loads 爆
     def _fix_str(m):
         return m.group(0).replace("\n", " ").replace("\r", " ")
-    s = re.sub(r'"(?:\\.|[^"\\])*"', _fix_str, s)
+    s = _JSON_STRING.sub(_fix_str, s)
 
     return s
 
@@ -695,7 +717,7 @@ def parse_json_from_text(text: str) -> Dict[str, Any]:
     # A. 嘗試「外層解包」── Claude v3 Messages API 回傳的 JSON 物件
     # ------------------------------------------------------------------
     try:
-        outer = json.loads(text)
+        outer = loads_json(text)
         # Claude 會回 {id, role, content:[{type:'text',text:'```json ...```'}], ...}
         if isinstance(outer, dict) and "content" in outer:
             for blk in outer["content"]:
@@ -719,7 +741,7 @@ def parse_json_from_text(text: str) -> Dict[str, Any]:
         raise ValueError(f"抽出的 JSON 為空。\n—— Raw head ——\n{text[:300]}")
 
     try:
-        return json.loads(cleaned)
+        return loads_json(cleaned)
     except json.JSONDecodeError as jde:
         snippet = cleaned[max(jde.pos - 60, 0): jde.pos + 60]
         raise ValueError(
@@ -792,8 +814,9 @@ def to_roman(n: int) -> str:
             n -= val
     return res
 
+@lru_cache(maxsize=None)
 def get_heading_prefix(level: int, index: int) -> str:
-    """回傳不同層級對應的標題前綴：1., a., i."""
+    """回傳不同層級對應的標題前綴：1., a., i.（純函式，結果快取，組裝章節時重複呼叫不再重算羅馬數字）"""
     if level == 1:
         return f"{index + 1}."
     elif level == 2:
@@ -813,6 +836,5 @@ def extract_text_from_html(html_content: str) -> str:
         return soup.get_text(separator=' ', strip=True)
     except ImportError:
         # 如果沒有 BeautifulSoup，使用簡單的正則表達式
-        import re
         clean_text = re.sub(r'<[^>]+>', '', html_content)
         return ' '.join(clean_text.split())
\ No newline at end of file
@@ -7,6 +7,7 @@
 import re
 from bs4 import BeautifulSoup
 import html
+import urllib.request
 from typing import Tuple, List, Dict, Any
 import concurrent.futures
 import streamlit as st
@@ -765,13 +766,19 @@ def _parse_export_response(response_json: dict) -> Tuple[bytes, dict]:
         raise RuntimeError(f"匯出失敗: {body['error']}")
 
     filedata, filename = body.get("filedata"), body.get("filename")
-    if not filedata or not filename:
+    download_url = body.get("download_url")
+    if not filename or not (filedata or download_url):
         raise RuntimeError("檔案生成失敗，請重試")
 
-    filedata = filedata.strip()
-    if len(filedata) % 4:
-        filedata += "=" * (4 - len(filedata) % 4)
-    decoded = base64.b64decode(filedata)
+    if filedata:
+        filedata = filedata.strip()
+        if len(filedata) % 4:
+            filedata += "=" * (4 - len(filedata) % 4)
+        decoded = base64.b64decode(filedata)
+    else:
+        # 匯出結果只回傳 S3 預簽章 URL，直接下載檔案
+        with urllib.request.urlopen(download_url, timeout=60) as resp:
+            decoded = resp.read()
     if not decoded:
         raise RuntimeError("檔案資料為空")
 